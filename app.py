@@ -1,9 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from tasks import process_video, load_result_from_file
-from celery_config import make_celery
+from tasks import (process_video, rematch_video, submit_process_video, submit_process_videos, result_store,
+                   progress_channel, metrics)
+from celery_config import make_celery, REDIS_URL
+from celery import states
 from dotenv import load_dotenv
 import os
+import json
 
 load_dotenv()
 api_key = os.environ.get('API_KEY')
@@ -12,26 +15,100 @@ app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 app.config.update(
-    CELERY_BROKER_URL='redis://localhost:6379/0',
-    CELERY_RESULT_BACKEND='redis://localhost:6379/0'
+    CELERY_BROKER_URL=REDIS_URL,
+    CELERY_RESULT_BACKEND=REDIS_URL
 )
 
 celery = make_celery(app)
 
+# 일괄 API 한 번에 받을 수 있는 최대 id 수
+MAX_BATCH_SIZE = 200
+
+# 진행 상황 스트림(SSE) 최대 유지 시간과 연결 유지용 heartbeat 간격(초)
+STREAM_TIMEOUT = 300
+STREAM_HEARTBEAT = 15
+# long-poll 최대 대기 시간(초)
+MAX_WAIT = 30
+
+def task_event(task):
+    # 작업의 현재 상태를 진행 채널 이벤트와 같은 형식으로 만든다
+    if task.status == 'PROGRESS':
+        return {'taskId': task.id, 'status': task.status, 'progress': task.info}
+    result = task.result if task.ready() and task.status != 'FAILURE' else None
+    return {'taskId': task.id, 'status': task.status, 'result': result}
+
+def read_ids(name):
+    # POST JSON {"videoIds": [...]} 또는 GET ?videoIds=a,b,c 모두 허용
+    body = request.get_json(silent=True) or {}
+    ids = body.get(name)
+    if ids is None:
+        ids = [value for value in request.args.get(name, '').split(',') if value]
+    if not isinstance(ids, list) or not all(isinstance(value, str) and value for value in ids):
+        return None
+    return list(dict.fromkeys(ids))
+
 @app.route('/api/process_video', methods=['GET'])
 def process_video_api():
     video_id = request.args.get('videoId')
     if not video_id:
         return jsonify({'error': 'Invalid input'}), 400
 
-    # # 이미 처리된 결과가 있는지 확인
-    # existing_result = load_result_from_file(video_id)
-    # if existing_result:
-    #     return jsonify({'taskId': None, 'result': existing_result}), 200
+    # 이미 처리된 결과가 있으면 작업 없이 바로 반환
+    existing_result = result_store.get(video_id)
+    if existing_result:
+        return jsonify({'task_id': None, 'result': existing_result}), 200
+
+    # 같은 동영상이 처리 중이면 새 작업을 만들지 않고 기존 task_id 를 반환
+    task_id = submit_process_video(video_id)
+    return jsonify({'task_id': task_id, 'result': None}), 202
+
+@app.route('/api/rematch_video', methods=['GET'])
+def rematch_video_api():
+    # 썸네일이 바뀐 동영상을 저장된 프레임 인덱스로 다시 매칭 (인덱스가 없으면 다시 분석)
+    video_id = request.args.get('videoId')
+    if not video_id:
+        return jsonify({'error': 'Invalid input'}), 400
+
+    task = rematch_video.delay(video_id)
+    return jsonify({'task_id': task.id, 'result': None}), 202
+
+@app.route('/api/process_videos', methods=['GET', 'POST'])
+def process_videos_api():
+    video_ids = read_ids('videoIds')
+    if not video_ids or len(video_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': 'Invalid input'}), 400
+
+    # 이미 처리된 결과는 한 번의 조회로 가져오고, 나머지만 (처리 중이 아니면) 큐에 넣는다
+    existing_results = result_store.get_many(video_ids)
+    task_ids = submit_process_videos([video_id for video_id in video_ids if video_id not in existing_results])
 
-    task = process_video.delay(video_id)
-    # return jsonify({'task_id': task.id, 'result': None}), 202
-    return jsonify({'task_id': task.id}), 202
+    response = {
+        video_id: {'task_id': task_ids.get(video_id), 'result': existing_results.get(video_id)}
+        for video_id in video_ids
+    }
+    return jsonify(response), 200 if not task_ids else 202
+
+@app.route('/api/task_statuses', methods=['GET', 'POST'])
+def get_task_statuses():
+    task_ids = read_ids('taskIds')
+    if not task_ids or len(task_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': 'Invalid input'}), 400
+
+    # Redis 결과 백엔드에서 MGET 한 번으로 모든 작업 상태를 가져온다
+    backend = process_video.backend
+    values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+
+    response = {}
+    for task_id, value in zip(task_ids, values):
+        meta = backend.decode_result(value) if value else {'status': states.PENDING, 'result': None}
+        status = meta['status']
+        # 단건 API 와 같이 완료되지 않았거나 실패한 작업은 result 를 비우고, 진행 중이면 progress 를 함께 준다
+        result = meta['result'] if status in states.READY_STATES and status != states.FAILURE else None
+        response[task_id] = {'taskId': task_id, 'status': status, 'result': result}
+        if status == 'PROGRESS':
+            response[task_id]['progress'] = meta['result']
+
+    return jsonify(response)
 
 @app.route('/api/task_status', methods=['GET'])
 def get_task_status():
@@ -47,6 +124,30 @@ def get_task_status():
     # REVOKED: 작업이 취소되었음을 나타냅니다.
     task = process_video.AsyncResult(task_id)
 
+    # wait=N 이면 작업이 끝나지 않았을 때 최대 N초 동안 다음 진행 이벤트를 기다린다 (long-poll)
+    wait = min(request.args.get('wait', 0, type=float), MAX_WAIT)
+    if wait > 0 and not task.ready():
+        pubsub = progress_channel.subscribe(task_id)
+        try:
+            # 구독한 뒤 다시 확인해야 그 사이 끝난 작업을 놓치지 않는다
+            event = next(progress_channel.listen(pubsub, wait), None) if not task.ready() else None
+        finally:
+            pubsub.close()
+
+        # 완료 이벤트는 작업이 반환되어 결과 백엔드에 SUCCESS 가 저장되기 전에 발행되므로
+        # 백엔드를 다시 읽지 않고 받은 이벤트를 그대로 응답한다
+        if event is not None:
+            progress = event.get('progress') if event['status'] == 'PROGRESS' else None
+            response = {
+                'taskId': task_id,
+                'status': event['status'],
+                'result': event.get('result') if progress is None else None
+            }
+            if progress is not None:
+                response['progress'] = progress
+            return jsonify(response)
+        task = process_video.AsyncResult(task_id)
+
     if not task.ready() or task.status == 'FAILURE':
         result = None
 
@@ -58,8 +159,42 @@ def get_task_status():
         'status': task.status,
         'result': result
     }
+    if task.status == 'PROGRESS':
+        response['progress'] = task.info
 
     return jsonify(response)
 
+@app.route('/api/task_events', methods=['GET'])
+def task_events():
+    task_id = request.args.get('taskId')
+    if not task_id:
+        return jsonify({'error': 'Invalid input'}), 400
+
+    def stream():
+        pubsub = progress_channel.subscribe(task_id)
+        try:
+            # 구독한 뒤 현재 상태를 먼저 보내 구독 전에 지나간 진행/완료를 놓치지 않는다
+            task = process_video.AsyncResult(task_id)
+            event = task_event(task)
+            yield f"data: {json.dumps(event)}\n\n"
+            if task.ready():
+                return
+
+            for event in progress_channel.listen(pubsub, STREAM_TIMEOUT, heartbeat=STREAM_HEARTBEAT):
+                if event is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            pubsub.close()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    # Prometheus 수집용 단계별 처리 시간 히스토그램
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=50001)
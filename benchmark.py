@@ -0,0 +1,297 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue as queue_module
+import platform
+import resource
+import subprocess
+import sys
+import time
+import cv2
+import numpy as np
+
+# 합성 동영상 벤치마크 / 정확도 측정.
+# 정답 프레임을 알고 있는 동영상을 cv2.VideoWriter 로 만들고, 그 프레임을 변형한 썸네일로
+# find_most_similar_frame 을 설정별로 실행해 처리 속도, 시간, 최대 메모리, 시간 오차를 JSON 으로 남긴다.
+#
+#   python benchmark.py                       (-> bench_output.json)
+#   python benchmark.py --cases 360p-crop --configs default,flann --repeat 3
+#   python benchmark.py --startup             (모듈 import / 첫 분석 준비 시간만 측정)
+
+WORK_DIR = 'assets/benchmark'
+# 실행 하나의 최대 시간(초). 넘기거나 측정 프로세스가 결과 없이 끝나면 실패한 행으로 기록하고 다음으로 넘어간다
+RUN_TIMEOUT = 600
+THUMBNAIL_SIZE = (480, 360)  # YouTube hqdefault (16:9 영상은 위아래 레터박스)
+
+# 이름: (폭, 높이, fps, 프레임 수, 정답 프레임)
+VIDEOS = {
+    '360p': (640, 360, 30, 1800, 1000),
+    '720p': (1280, 720, 30, 1800, 1000),
+    '720p-long': (1280, 720, 30, 9000, 6100),
+}
+
+# 이름: (동영상, 썸네일 변형)
+CASES = {
+    '360p-exact': ('360p', 'exact'),
+    '360p-crop': ('360p', 'crop'),
+    '720p-exact': ('720p', 'exact'),
+    '720p-crop': ('720p', 'crop'),
+    '720p-overlay': ('720p', 'overlay'),
+    '720p-color': ('720p', 'color'),
+    '720p-combined': ('720p', 'combined'),
+    '720p-long-combined': ('720p-long', 'combined'),
+}
+
+# 이름: ImageAnalyzer 인자
+CONFIGS = {
+    'default': {},
+    'scene': {'sampling': 'scene'},
+    'keyframe': {'sampling': 'keyframe'},
+    'flann': {'matcher': 'flann'},
+    'bf': {'matcher': 'bf'},
+    'decode360': {'decode_height': 360},
+    'no-early-exit': {'early_exit_ratio': None},
+    'workers4': {'workers': 4},
+}
+
+DEFAULT_CASES = ['360p-exact', '720p-exact', '720p-crop', '720p-combined']
+DEFAULT_CONFIGS = ['default', 'scene', 'flann', 'decode360']
+
+
+def synthetic_frame(scenes, frame_idx, width, height, scene_length=150):
+    # 장면마다 다른 저주파 노이즈 배경 + 느린 팬 + 움직이는 도형/프레임 번호
+    scene = scenes[(frame_idx // scene_length) % len(scenes)]
+    offset = frame_idx % scene_length
+    base = cv2.resize(scene, (width, height), interpolation=cv2.INTER_CUBIC)
+    scale = width / 1280
+    transform = np.float32([[1.1, 0, -offset * 0.8 * scale], [0, 1.1, -20 * scale]])
+    frame = cv2.warpAffine(base, transform, (width, height), borderMode=cv2.BORDER_REFLECT)
+    cv2.putText(frame, f"{frame_idx}", (int((100 + offset * 2) * scale), int(400 * scale)),
+                cv2.FONT_HERSHEY_SIMPLEX, 4 * scale, (255, 255, 255), max(1, int(8 * scale)))
+    cv2.circle(frame, (int((200 + (frame_idx * 6) % 800) * scale), int(200 * scale)), int(60 * scale),
+               (0, 0, 255), -1)
+    return frame
+
+
+def make_video(video_path, width, height, fps, frame_count, target_frame, seed=1):
+    """합성 동영상을 쓰고 정답 프레임을 반환한다"""
+    rng = np.random.default_rng(seed)
+    scenes = [rng.integers(0, 255, (9, 16, 3), dtype=np.uint8) for _ in range(24)]
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    target = None
+    for frame_idx in range(frame_count):
+        frame = synthetic_frame(scenes, frame_idx, width, height)
+        if frame_idx == target_frame:
+            target = frame.copy()
+        writer.write(frame)
+    writer.release()
+    return target
+
+
+def letterbox(frame):
+    thumb_width, thumb_height = THUMBNAIL_SIZE
+    height = round(frame.shape[0] * thumb_width / frame.shape[1])
+    resized = cv2.resize(frame, (thumb_width, height), interpolation=cv2.INTER_AREA)
+    thumbnail = np.zeros((thumb_height, thumb_width, 3), np.uint8)
+    top = (thumb_height - height) // 2
+    thumbnail[top:top + height] = resized
+    return thumbnail
+
+
+def make_thumbnail(frame, variant):
+    """정답 프레임으로 썸네일을 만든다 (exact / crop / overlay / color / combined)"""
+    height, width = frame.shape[:2]
+    if variant in ('crop', 'combined'):
+        # 가장자리를 잘라 확대
+        frame = frame[height // 12:height - height // 12, width // 12:width - width // 12]
+    if variant in ('color', 'combined'):
+        frame = cv2.convertScaleAbs(frame, alpha=1.2, beta=15)
+    if variant in ('overlay', 'combined'):
+        frame = frame.copy()
+        scale = frame.shape[1] / 1280
+        cv2.putText(frame, "WOW!!", (int(40 * scale), int(120 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                    4 * scale, (0, 255, 255), max(1, int(10 * scale)))
+    return letterbox(frame)
+
+
+def prepare_case(case, work_dir=WORK_DIR):
+    """(video_path, thumbnail_path, 정답 시간) - 같은 동영상/썸네일은 다시 만들지 않는다"""
+    video_name, variant = CASES[case]
+    width, height, fps, frame_count, target_frame = VIDEOS[video_name]
+    os.makedirs(work_dir, exist_ok=True)
+    video_path = os.path.join(work_dir, f'{video_name}.mp4')
+    frame_path = os.path.join(work_dir, f'{video_name}-target.png')
+    thumbnail_path = os.path.join(work_dir, f'{case}.jpg')
+
+    if not (os.path.exists(video_path) and os.path.exists(frame_path)):
+        target = make_video(video_path, width, height, fps, frame_count, target_frame)
+        cv2.imwrite(frame_path, target)
+    if not os.path.exists(thumbnail_path):
+        cv2.imwrite(thumbnail_path, make_thumbnail(cv2.imread(frame_path), variant))
+    return video_path, thumbnail_path, target_frame / fps
+
+
+def measure(video_path, thumbnail_path, config, queue):
+    # 별도 프로세스에서 실행해 최대 메모리(ru_maxrss)가 이전 실행에 섞이지 않게 한다
+    from utils import analyzer
+
+    start = time.perf_counter()
+    try:
+        analyzer_obj = analyzer.ImageAnalyzer(video_path=video_path, target_image_path=thumbnail_path, **config)
+        _, best_frame_time = analyzer_obj.find_most_similar_frame()
+    except Exception as e:
+        queue.put({'error': f'{type(e).__name__}: {e}'})
+        return
+    elapsed = time.perf_counter() - start
+
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    queue.put({
+        'best_frame_time': best_frame_time,
+        'wall_time': elapsed,
+        'examined_frames': analyzer_obj.examined_frames,
+        'refined_frames': analyzer_obj.refined_frames,
+        'frames_per_second': analyzer_obj.examined_frames / elapsed if elapsed else None,
+        'peak_memory_mb': peak_kb / 1024,
+        'truncated': analyzer_obj.truncated,
+        'early_exited': analyzer_obj.early_exited,
+        'stage_times': analyzer_obj.stage_times,
+    })
+
+
+# 새 인터프리터에서 분석기 모듈 import 와 첫 ImageAnalyzer 생성(썸네일 특징점 추출)에 걸리는 시간을 잰다
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from utils import analyzer
+imported = time.perf_counter()
+if sys.argv[2] == '1':
+    analyzer.warm_up()  # 워커에서는 worker_process_init 에서 작업 전에 실행된다
+warmed = time.perf_counter()
+analyzer.ImageAnalyzer(video_path=None, target_image_path=sys.argv[1])
+print(json.dumps({'warm': sys.argv[2] == '1', 'import_seconds': imported - start,
+                  'warm_up_seconds': warmed - imported, 'first_analyzer_seconds': time.perf_counter() - warmed}))
+"""
+
+
+def run_startup(work_dir=WORK_DIR):
+    _, thumbnail_path, _ = prepare_case(DEFAULT_CASES[0], work_dir)
+    results = []
+    for warm in ('0', '1'):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, thumbnail_path, warm],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def collect(process, queue, timeout):
+    """측정 프로세스의 결과를 기다린다. 죽거나 시간을 넘기면 {'error': ...} 를 반환"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            # 끝나기 직전에 넣은 결과가 아직 파이프에 남아 있을 수 있다
+            try:
+                return queue.get(timeout=1.0)
+            except queue_module.Empty:
+                return {'error': f'exited with code {process.exitcode}'}
+        if time.time() > deadline:
+            process.terminate()
+            return {'error': f'timed out after {timeout}s'}
+
+
+def run_case(case, config_name, work_dir=WORK_DIR, timeout=RUN_TIMEOUT):
+    video_path, thumbnail_path, truth = prepare_case(case, work_dir)
+    fps = VIDEOS[CASES[case][0]][2]
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(video_path, thumbnail_path, CONFIGS[config_name], queue))
+    process.start()
+    result = collect(process, queue, timeout)
+    process.join()
+
+    found = result.get('best_frame_time')
+    result.update({
+        'case': case,
+        'config': config_name,
+        'truth_time': truth,
+        'time_error': None if found is None else abs(found - truth),
+        'frame_error': None if found is None else round(abs(found - truth) * fps),
+    })
+    return result
+
+
+def format_value(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'cpu_count': os.cpu_count(),
+        'machine': platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ImageAnalyzer benchmark on synthetic videos')
+    parser.add_argument('--cases', default=','.join(DEFAULT_CASES), help=f"comma separated: {', '.join(CASES)}")
+    parser.add_argument('--configs', default=','.join(DEFAULT_CONFIGS),
+                        help=f"comma separated: {', '.join(CONFIGS)}")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=RUN_TIMEOUT, help='seconds per run before it is failed')
+    parser.add_argument('--work-dir', default=WORK_DIR)
+    parser.add_argument('--output', default='bench_output.json', help='JSON output path')
+    parser.add_argument('--startup', action='store_true', help='measure import / first analyzer time only')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.startup:
+        startup = run_startup(args.work_dir)
+        for result in startup:
+            print(f"warm={result['warm']!s:5s} import={result['import_seconds']:.3f}s "
+                  f"warm_up={result['warm_up_seconds']:.3f}s first_analyzer={result['first_analyzer_seconds']:.3f}s")
+        with open(args.output, 'w') as file:
+            json.dump({'environment': environment(), 'startup': startup}, file, indent=2)
+        print(f"Results written to {args.output}")
+        return
+
+    cases = [case for case in args.cases.split(',') if case]
+    configs = [config for config in args.configs.split(',') if config]
+
+    results = []
+    for case in cases:
+        for config_name in configs:
+            for run in range(args.repeat):
+                result = run_case(case, config_name, args.work_dir, args.timeout)
+                result['run'] = run
+                results.append(result)
+                if 'error' in result:
+                    print(f"{case:20s} {config_name:14s} FAILED: {result['error']}", flush=True)
+                    continue
+                print(f"{case:20s} {config_name:14s} error={result['time_error']} "
+                      f"wall={result['wall_time']:.2f}s fps={format_value(result['frames_per_second'], '.0f')} "
+                      f"mem={result['peak_memory_mb']:.0f}MB", flush=True)
+
+    with open(args.output, 'w') as file:
+        json.dump({'environment': environment(), 'results': results}, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,10 @@
-from celery_config import make_celery
+from celery_config import make_celery, REDIS_URL
 from flask import Flask
 
 app = Flask(__name__)
 app.config.update(
-    CELERY_BROKER_URL='redis://localhost:6379/0',
-    CELERY_RESULT_BACKEND='redis://localhost:6379/0'
+    CELERY_BROKER_URL=REDIS_URL,
+    CELERY_RESULT_BACKEND=REDIS_URL
 )
 
 celery = make_celery(app)
@@ -1,4 +1,10 @@
+import os
 from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+# 브로커/결과 백엔드와 utils 의 Redis 구성 요소(결과 저장소, 임대, 진행 채널, 지표, ETag 캐시)가 함께 쓰는 Redis
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 
 def make_celery(app):
     celery = Celery(
@@ -0,0 +1,75 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from utils.crawler import TrendingCrawler
+
+# 로컬 스텁 서버로 TrendingCrawler 의 페이지 넘김, ETag/304 재사용, 실패한 지역 건너뛰기를 확인한다.
+#
+#   python crawler_check.py
+
+# 지역: 페이지 목록 (FAIL 지역은 항상 500)
+CHARTS = {
+    'KR': [['kr1', 'kr2'], ['kr3', 'shared']],
+    'US': [['us1', 'shared']],
+}
+FAILING_REGION = 'FAIL'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []  # (지역, 페이지, 상태 코드)
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        region = params['regionCode'][0]
+        page = int(params.get('pageToken', ['0'])[0])
+
+        if region == FAILING_REGION:
+            return self.reply(region, page, 500)
+
+        pages = CHARTS[region]
+        etag = f'"{region}-{page}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.reply(region, page, 304, headers={'ETag': etag})
+
+        body = {'items': [{'id': video_id} for video_id in pages[page]]}
+        if page + 1 < len(pages):
+            body['nextPageToken'] = str(page + 1)
+        self.reply(region, page, 200, json.dumps(body).encode(), {'ETag': etag, 'Content-Type': 'application/json'})
+
+    def reply(self, region, page, status, body=b'', headers=None):
+        StubHandler.requests_seen.append((region, page, status))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}/youtube/v3/videos'
+
+    crawler = TrendingCrawler('test-key', regions=['KR', FAILING_REGION, 'US'], base_url=base_url)
+    expected = ['kr1', 'kr2', 'kr3', 'shared', 'us1']
+
+    # 첫 크롤링: 모두 200, 실패한 지역은 건너뛰고 나머지 결과는 중복 없이 반환
+    first = crawler.crawl()
+    assert first == expected, first
+    assert sorted(StubHandler.requests_seen) == [('FAIL', 0, 500), ('KR', 0, 200), ('KR', 1, 200), ('US', 0, 200)], \
+        StubHandler.requests_seen
+
+    # 두 번째 크롤링: 바뀌지 않은 페이지는 304 로 끝나고 캐시된 id 와 다음 페이지 토큰을 그대로 사용
+    StubHandler.requests_seen = []
+    second = crawler.crawl()
+    assert second == expected, second
+    assert sorted(StubHandler.requests_seen) == [('FAIL', 0, 500), ('KR', 0, 304), ('KR', 1, 304), ('US', 0, 304)], \
+        StubHandler.requests_seen
+
+    server.shutdown()
+    print(f"Crawler check passed: {len(first)} videos, second crawl served from 304 responses")
@@ -7,9 +7,22 @@ celery -A tasks purge -f
 mkdir -p logs
 
 # Celery 워커 실행
-echo "Starting Celery worker..."
-nohup celery -A tasks worker --loglevel=info --pool=prefork --concurrency=16 > logs/celery_worker.out 2>&1 &
-CELERY_WORKER_PID=$!
+# 브로커/결과 백엔드/결과 저장소가 모두 같은 Redis 를 쓴다 (.env 의 REDIS_URL, 기본 redis://localhost:6379/0)
+# 다운로드/분석/정리는 호스트별 큐(download.<host>, analysis.<host>)로 흐르므로 두 워커가 같은 이름을 써야 한다
+export WORKER_HOST=${WORKER_HOST:-$(hostname)}
+
+# download 워커: 다운로드(네트워크 대기)와 가벼운 작업(process_video, 결과 저장, 크롤링)을 스레드 풀로 처리
+# 작업 공간 용량 예약을 한 프로세스에서 관리하므로 호스트마다 하나만 띄운다 (.env 의 SCRATCH_DIR, SCRATCH_QUOTA_MB)
+echo "Starting Celery download worker..."
+nohup celery -A tasks worker -Q celery,download.$WORKER_HOST -n download@%h --loglevel=info --pool=threads --concurrency=64 > logs/celery_download.out 2>&1 &
+CELERY_DOWNLOAD_PID=$!
+
+# analysis 워커: CPU 를 쓰는 분석만 prefork 로 처리
+# 동영상 하나를 여러 프로세스로 나눠 분석하려면 .env 에 ANALYZER_WORKERS 를 설정하고
+# --concurrency x ANALYZER_WORKERS 가 코어 수를 넘지 않도록 맞춘다 (예: 16코어 -> concurrency 4, ANALYZER_WORKERS 4)
+echo "Starting Celery analysis worker..."
+nohup celery -A tasks worker -Q analysis.$WORKER_HOST -n analysis@%h --loglevel=info --pool=prefork --concurrency=16 > logs/celery_analysis.out 2>&1 &
+CELERY_ANALYSIS_PID=$!
 
 # Celery 비트 실행
 echo "Starting Celery beat..."
@@ -18,7 +31,9 @@ CELERY_BEAT_PID=$!
 
 # Gunicorn 서버 실행
 echo "Starting Gunicorn..."
-nohup gunicorn -w 16 -b 0.0.0.0:50001 app:app > logs/gunicorn.out 2>&1 &
+# 진행 상황 스트림(SSE)과 long-poll 요청이 워커를 오래 잡고 있으므로 스레드 워커를 사용
+# (ResultStore 는 Redis 를 쓰므로 스레드/호스트가 늘어도 같은 결과를 본다)
+nohup gunicorn -w 16 -k gthread --threads 8 -b 0.0.0.0:50001 app:app > logs/gunicorn.out 2>&1 &
 GUNICORN_PID=$!
 
 # Flower 실행
@@ -28,7 +43,8 @@ GUNICORN_PID=$!
 
 # 모든 프로세스가 백그라운드에서 실행되고 있는지 확인
 echo "Gunicorn PID: $GUNICORN_PID"
-echo "Celery Worker PID: $CELERY_WORKER_PID"
+echo "Celery Download Worker PID: $CELERY_DOWNLOAD_PID"
+echo "Celery Analysis Worker PID: $CELERY_ANALYSIS_PID"
 echo "Celery Beat PID: $CELERY_BEAT_PID"
 #echo "Flower PID: $FLOWER_PID"
 
@@ -43,8 +59,9 @@ cleanup() {
         kill $pid
     done
 
-    echo "Stopping Celery worker..."
-    kill $CELERY_WORKER_PID
+    echo "Stopping Celery workers..."
+    kill $CELERY_DOWNLOAD_PID
+    kill $CELERY_ANALYSIS_PID
     echo "Stopping Celery beat..."
     kill $CELERY_BEAT_PID
 #    echo "Stopping Flower..."
@@ -61,8 +78,12 @@ while true; do
         echo "Gunicorn has stopped."
         cleanup
     fi
-    if ! ps -p $CELERY_WORKER_PID > /dev/null; then
-        echo "Celery worker has stopped."
+    if ! ps -p $CELERY_DOWNLOAD_PID > /dev/null; then
+        echo "Celery download worker has stopped."
+        cleanup
+    fi
+    if ! ps -p $CELERY_ANALYSIS_PID > /dev/null; then
+        echo "Celery analysis worker has stopped."
         cleanup
     fi
     if ! ps -p $CELERY_BEAT_PID > /dev/null; then
@@ -1,129 +1,338 @@
-from celery import Celery
+from celery import Celery, chain
 from celery.schedules import crontab
+from celery import states
+from celery.exceptions import Ignore, MaxRetriesExceededError
+from celery.signals import worker_process_init
+from celery_config import REDIS_URL
 from utils import downloader, analyzer
+from utils.frame_index import FrameIndex
+from utils.result_store import ResultStore
+from utils.inflight import InflightRegistry
+from utils.progress import ProgressChannel, ProgressPublisher
+from utils.crawler import TrendingCrawler, RedisEtagCache, YOUTUBE_VIDEOS_URL
+from utils.metrics import Metrics
+from utils.lease import Lease, LeaseKeeper, LEASE_TTL
+from utils.assets import AssetManager
 from dotenv import load_dotenv
-from filelock import FileLock
-import requests
 import os
-import json
+import socket
+import tempfile
+import time
 import logging
 
-# 로깅 설정
-logging.basicConfig(level=logging.DEBUG)
+# 로그 레벨은 실행하는 쪽(celery --loglevel, gunicorn)이 정한다
 logger = logging.getLogger(__name__)
 
-app = Celery('tasks', broker='redis://localhost:6379/0', backend='redis://localhost:6379/0')
-
-def save_result_to_file(video_id, result):
-    result_path = f'assets/{video_id}/result.txt'
-    os.makedirs(os.path.dirname(result_path), exist_ok=True)
-    with open(result_path, 'w') as file:
-        for key, value in result.items():
-            file.write(f'{key}: {value}\n')
-
-def load_result_from_file(video_id):
-    result_path = f'assets/{video_id}/result.txt'
-    if os.path.exists(result_path):
-        with open(result_path, 'r') as file:
-            result = {}
-            for line in file:
-                key, value = line.strip().split(': ', 1)
-                if key == 'best_frame_time':
-                    result[key] = float(value)
-                else:
-                    result[key] = value
-            return result
-    return None
-
-def delete_video_and_thumbnail(video_id):
-    video_path = f'assets/{video_id}/video.mp4'
-    thumbnail_path = f'assets/{video_id}/thumbnail.jpg'
-    if os.path.exists(video_path):
-        os.remove(video_path)
-    if os.path.exists(thumbnail_path):
-        os.remove(thumbnail_path)
-
-def load_processed_video_ids():
-    if os.path.exists('.videos.json'):
-        with open('.videos.json', 'r') as file:
-            return json.load(file)
-    return []
-
-def save_processed_video_ids(video_ids):
-    with open('.videos.json', 'w') as file:
-        json.dump(video_ids, file)
+app = Celery('tasks', broker=REDIS_URL, backend=REDIS_URL)
 
-@app.task
-def process_video(video_id):
-    processed_video_ids = load_processed_video_ids()
-    lock = FileLock(f"assets/{video_id}.lock")  # 락 파일 사용
-    with lock:  # 락을 사용하여 중복 작업 방지
-        existing_result = load_result_from_file(video_id)
-        if existing_result:
-            return existing_result
+# 네트워크 작업(다운로드)과 CPU 작업(분석)을 서로 다른 큐/워커 풀로 보낸다
+# - celery(기본 큐, 모든 호스트 공용): process_video / 크롤링 같은 가벼운 작업
+# - download.<host>: 스레드 풀 워커 (다운로드, 결과 저장/정리)
+# - analysis.<host>: prefork 워커 (코어 수에 맞춘 분석)
+# 받은 파일은 그 호스트의 작업 공간에 있고 스트림 URL 도 요청한 IP 에서만 열리므로,
+# process_video 를 꺼낸 호스트가 다운로드부터 정리까지 자기 호스트 큐로 보낸다 (analysis_pipeline)
+WORKER_HOST = os.environ.get('WORKER_HOST') or socket.gethostname()
+
+def host_queues(host=WORKER_HOST):
+    return f'download.{host}', f'analysis.{host}'
+
+# 사용자 요청이 매시 크롤링 작업 뒤에 줄 서지 않도록 큐마다 우선순위 단계를 둔다.
+# Redis 브로커는 숫자가 작을수록 먼저 꺼내며, prefetch 를 1 로 두어 워커가 낮은 우선순위 작업을 미리 쌓아 두지 않게 한다
+app.conf.broker_transport_options = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    # 이 시간(초) 안에 ack 되지 않은 메시지는 다시 전달된다 (countdown 으로 예약한 메시지 포함, CRAWL_WINDOW 참고)
+    'visibility_timeout': 3600,
+}
+app.conf.worker_prefetch_multiplier = 1
+INTERACTIVE_PRIORITY = 0
+CRAWL_PRIORITY = 9
+# 다시 요청하면 새 작업을 만들어야 하는 작업 상태
+DEAD_STATES = frozenset({states.FAILURE, states.REVOKED})
+
+# 동영상 하나를 분석할 때 사용할 프로세스 수 (Celery --concurrency x ANALYZER_WORKERS 가 코어 수를 넘지 않도록 설정)
+load_dotenv()
+ANALYZER_WORKERS = int(os.environ.get('ANALYZER_WORKERS', 1))
+# 동영상 하나를 분석할 수 있는 최대 시간(초). 넘기면 그때까지의 최선 결과를 저장하고 truncated 로 표시
+ANALYZER_TIME_BUDGET = float(os.environ['ANALYZER_TIME_BUDGET']) if os.environ.get('ANALYZER_TIME_BUDGET') else None
+# 1 이면 분석하면서 디코딩한 샘플 프레임으로 프레임 인덱스(<INDEX_DIR>/<videoId>/index)를 함께 만들어 둔다
+BUILD_FRAME_INDEX = os.environ.get('FRAME_INDEX') == '1'
+# 1 이면 동영상을 디스크에 받지 않고 스트림 URL 을 바로 디코딩하며 분석한다 (다운로드와 분석이 겹침)
+ANALYZE_FROM_STREAM = os.environ.get('ANALYZE_FROM_STREAM') == '1'
+# 크롤링으로 큐에 넣는 동영상 수 (분당). 0 이면 제한 없이 한 번에 넣는다
+CRAWL_RATE_LIMIT = float(os.environ.get('CRAWL_RATE_LIMIT', 30))
+# 한 번의 크롤링이 countdown 으로 나눠 넣는 최대 시간(초). 크롤링 주기(1시간)와 visibility_timeout 보다 짧아야
+# 예약된 메시지가 다시 전달되어 같은 task_id 로 중복 실행되지 않는다. 넘치는 동영상은 다음 크롤링에서 넣는다
+CRAWL_WINDOW = float(os.environ.get('CRAWL_WINDOW', 3000))
+# 크롤링할 지역/카테고리 (쉼표 구분, 카테고리가 비어 있으면 전체 인기 동영상)
+CRAWL_REGIONS = [value for value in os.environ.get('CRAWL_REGIONS', 'KR').split(',') if value]
+CRAWL_CATEGORIES = [value for value in os.environ.get('CRAWL_CATEGORIES', '').split(',') if value] or [None]
+
+# 분석 결과 저장소 (결과가 저장된 videoId 가 처리된 동영상)
+result_store = ResultStore()
+# 처리 중인 동영상 -> task_id (같은 동영상 요청을 하나의 작업으로 합친다).
+# 실패/취소로 끝난 작업에 새 요청이 묶이지 않도록 그 작업의 표시는 새 작업으로 바꾼다
+inflight = InflightRegistry(is_dead=lambda task_id: process_video.AsyncResult(task_id).state in DEAD_STATES)
+# 작업 진행 상황 채널 (API 의 SSE / long-poll 이 구독)
+progress_channel = ProgressChannel()
+# 동영상 처리 임대 (같은 동영상을 여러 호스트의 워커가 동시에 처리하지 않도록)
+video_lease = Lease(prefix='lease:video:')
+# 임대를 얻지 못한 중복 작업을 다시 예약하는 간격(초)
+LEASE_RETRY_DELAY = 15
+# 다운로드 작업 공간 (SCRATCH_DIR, SCRATCH_QUOTA_MB). 임대가 남아 있는 동영상은 처리 중으로 보고 지우지 않는다
+asset_manager = AssetManager(is_active=lambda video_id: video_lease.owner(video_id) is not None)
+# 단계별 처리 시간 히스토그램 (API 의 /metrics 로 노출)
+metrics = Metrics()
+# 인기 동영상 크롤러 (연결 풀과 ETag 캐시를 크롤링마다 재사용하도록 처음 쓸 때 한 번 만든다)
+crawler = None
+
+def get_crawler():
+    global crawler
+    if crawler is None:
+        crawler = TrendingCrawler(os.environ.get('API_KEY'), regions=CRAWL_REGIONS, categories=CRAWL_CATEGORIES,
+                                  base_url=os.environ.get('YOUTUBE_API_URL', YOUTUBE_VIDEOS_URL),
+                                  cache=RedisEtagCache())
+    return crawler
+
+def submit_process_video(video_id, priority=INTERACTIVE_PRIORITY):
+    # 이미 처리 중인 동영상이면 새 작업을 만들지 않고 기존 task_id 를 반환
+    # (크롤링이 낮은 우선순위로 넣어 둔 작업이면 우선순위를 올려 같은 task_id 로 바로 다시 보낸다)
+    task_id, created = inflight.claim(video_id, priority)
+    if created or (priority < CRAWL_PRIORITY and inflight.promote(video_id, task_id, priority)):
+        process_video.apply_async(args=[video_id], kwargs={'priority': priority, 'submitted_at': time.time()},
+                                  task_id=task_id, priority=priority)
+    return task_id
+
+def submit_process_videos(video_ids, priority=INTERACTIVE_PRIORITY, rate_limit=None):
+    """
+    여러 동영상을 한 번에 등록하고 새로 등록된 것만 큐에 넣는다 ({video_id: task_id}).
+    rate_limit(분당 개수)을 주면 countdown 을 나눠 주어 한꺼번에 큐를 채우지 않는다
+    """
+    claims = inflight.claim_many(video_ids, priority)
+    interval = 60.0 / rate_limit if rate_limit else 0
+    queued = 0
+    # 브로커 연결 하나로 모든 메시지를 보낸다
+    with app.producer_or_acquire() as producer:
+        for video_id, (task_id, created) in claims.items():
+            if not created and priority < CRAWL_PRIORITY and inflight.promote(video_id, task_id, priority):
+                # 크롤링이 넣어 둔 작업: 같은 task_id 로 countdown 없이 다시 보낸다
+                process_video.apply_async(args=[video_id], kwargs={'priority': priority, 'submitted_at': time.time()},
+                                          task_id=task_id, priority=priority, producer=producer)
+            elif created:
+                # 대기 시간은 countdown 이 끝난 시점부터 잰다
+                countdown = queued * interval
+                process_video.apply_async(args=[video_id],
+                                          kwargs={'priority': priority, 'submitted_at': time.time() + countdown},
+                                          task_id=task_id, priority=priority, countdown=countdown or None,
+                                          producer=producer)
+                queued += 1
+    return {video_id: task_id for video_id, (task_id, _) in claims.items()}
+
+@worker_process_init.connect
+def init_analysis_process(**kwargs):
+    # prefork 자식 프로세스마다 한 번: 검출기를 만들고 OpenCV 를 미리 초기화해 첫 작업이 그 비용을 치르지 않게 한다
+    analyzer.warm_up()
+
+@app.task(bind=True)
+def process_video(self, video_id, priority=INTERACTIVE_PRIORITY, submitted_at=None):
+    # 사용자 요청으로 우선순위를 올려 다시 보낸 작업의 늦게 도착한 원래 메시지는 버린다
+    # (같은 task_id 이므로 상태를 남기지 않는다. 올린 작업이 이미 끝났다면 아래 결과 확인으로 끝난다)
+    if priority > INTERACTIVE_PRIORITY and inflight.get(video_id) == self.request.id:
+        current_priority = inflight.priority(self.request.id)
+        if current_priority is not None and current_priority < priority:
+            logger.debug(f"Dropping superseded copy of {self.request.id} (priority {priority})")
+            raise Ignore()
+        # 이미 시작했으므로 이후 사용자 요청이 같은 작업을 다시 보내지 않게 한다
+        inflight.promote(video_id, self.request.id, INTERACTIVE_PRIORITY)
+
+    if submitted_at is not None:
+        metrics.observe('queue_wait_seconds', max(0.0, time.time() - submitted_at))
+
+    # 이미 처리된 결과가 있으면 바로 반환
+    existing_result = result_store.get(video_id)
+    if existing_result:
+        inflight.release(video_id, self.request.id)
+        ProgressPublisher(self, progress_channel).finish(states.SUCCESS, existing_result)
+        return existing_result
+
+    # 다운로드(download 큐) -> 분석(analysis 큐) -> 저장/정리 단계로 나눠 실행.
+    # replace 로 마지막 단계가 이 작업의 task_id 를 이어받으므로 클라이언트가 받는 결과 형식은 그대로다
+    raise self.replace(analysis_pipeline(video_id, self.request.id, priority))
+
+def analysis_pipeline(video_id, task_id, priority=INTERACTIVE_PRIORITY, refresh=False):
+    # 모든 단계를 이 호스트의 큐로 보낸다 (파일/스트림 URL 을 다른 호스트에서 열 수 없음).
+    # 단계마다 같은 우선순위로 큐에 넣어 크롤링 작업이 다운로드/분석 큐에서도 뒤로 밀리도록 한다
+    # 어느 단계든 예외로 끝나면 persist_result 까지 가지 못하므로 pipeline_failed 가 대신 정리한다
+    download_queue, analysis_queue = host_queues()
+    pipeline = chain(download_video.s(video_id, task_id, refresh).set(queue=download_queue, priority=priority),
+                     analyze_video.s().set(queue=analysis_queue, priority=priority),
+                     persist_result.s().set(queue=download_queue, priority=priority))
+    return pipeline.on_error(pipeline_failed.s(video_id, task_id))
 
+@app.task(bind=True, max_retries=LEASE_TTL // LEASE_RETRY_DELAY)
+def download_video(self, video_id, task_id, refresh=False):
+    # 네트워크 작업만 수행 (download 큐의 스레드 워커). refresh 면 저장된 결과가 있어도 다시 분석한다
+    payload = {'videoId': video_id, 'taskId': task_id}
+    existing_result = None if refresh else result_store.get(video_id)
+    if existing_result:
+        payload['result'] = existing_result
+        return payload
+
+    # 같은 동영상을 다른 작업(다른 호스트 포함)이 처리 중이면 기다리지 않고 다시 예약한다.
+    # 임대는 persist_result 에서 풀리고, 소유 작업이 죽으면 TTL 이 지나 풀린다
+    owner = task_id or self.request.id
+    if not video_lease.acquire(video_id, owner):
         try:
-            downloader.Downloader().execute(videoId=video_id)
-            video_path = f'assets/{video_id}/video.mp4'
-            target_image_path = f'assets/{video_id}/thumbnail.jpg'
-
-            analyzer_obj = analyzer.ImageAnalyzer(video_path=video_path, target_image_path=target_image_path)
-            best_frame, best_frame_time = analyzer_obj.find_most_similar_frame()
-
-            result = {
-                'videoId': video_id,
-                'best_frame_time': best_frame_time,
-                'message': 'Best frame found successfully' if best_frame is not None else 'Could not find the best frame'
-            }
-            save_result_to_file(video_id, result)
-            delete_video_and_thumbnail(video_id)
-            # 처리한 동영상 ID 목록에 추가
-            processed_video_ids.append(video_id)
-            save_processed_video_ids(processed_video_ids)
-
-            return result
-        except Exception as e:
-            result = {'error': str(e)}
-            return result
+            raise self.retry(countdown=LEASE_RETRY_DELAY)
+        except MaxRetriesExceededError:
+            payload['result'] = {'error': 'Video is being processed by another task'}
+            return payload
+    payload['leaseOwner'] = owner
+    # 이 호스트의 작업 공간에서 워커가 죽어 남은 파일을 정리 (주기마다 한 번)
+    asset_manager.maybe_sweep()
 
-@app.task
-def fetch_and_download_videos():
-    load_dotenv()
-    api_key = os.environ.get('API_KEY')
-    base_url = "https://www.googleapis.com/youtube/v3/videos"
-    processed_video_ids = load_processed_video_ids()
-    params = {
-        "part": "snippet",
-        "chart": "mostPopular",
-        "regionCode": "KR",
-        "maxResults": 10,
-        "key": api_key
-    }
+    started = time.time()
+    try:
+        output_path = asset_manager.video_dir(video_id)
+        if ANALYZE_FROM_STREAM:
+            video_url = downloader.Downloader().open_stream(videoId=video_id, output_path=output_path)
+            if video_url is None:
+                raise ValueError("No video stream available")
+            payload['video_url'] = video_url
+        else:
+            # 작업 공간 용량이 찰 때는 자리가 날 때까지 기다렸다가 받는다
+            downloader.Downloader().execute(videoId=video_id, output_path=output_path,
+                                            reserve=lambda size: asset_manager.reserve(video_id, size))
+            asset_manager.commit(video_id)
+        metrics.observe('download_seconds', time.time() - started)
+    except Exception as e:
+        payload['result'] = {'error': str(e)}
+    payload['downloaded_at'] = time.time()
+    return payload
+
+@app.task(bind=True)
+def analyze_video(self, payload):
+    # CPU 작업만 수행 (analysis 큐의 prefork 워커)
+    if 'result' in payload:
+        return payload
 
-    response = requests.get(base_url, params=params)
-    data = response.json()
+    video_id = payload['videoId']
+    metrics.observe('analysis_queue_wait_seconds', max(0.0, time.time() - payload['downloaded_at']))
+    # 큐에서 기다리는 동안 임대가 만료됐을 수 있으므로 연장(또는 다시 획득)하고, 분석 중에도 진행 콜백에서 연장한다.
+    # 그 사이 다른 작업이 가져갔으면 그 작업의 파일이므로 지우지 않고 끝낸다
+    lease_keeper = LeaseKeeper(video_lease, video_id, payload['leaseOwner'])
+    if not lease_keeper.hold():
+        payload.pop('leaseOwner')
+        payload['result'] = {'error': 'Video is being processed by another task'}
+        return payload
+    # 스트림 모드면 파일 대신 URL 을 그대로 디코더에 넘긴다
+    video_path = payload.get('video_url') or asset_manager.video_path(video_id)
+    target_image_path = asset_manager.thumbnail_path(video_id)
 
-    logger.debug(f"items:: {data}")
+    # 분석 진행 상황은 클라이언트가 가진 task_id 로 전달
+    publisher = ProgressPublisher(self, progress_channel, task_id=payload['taskId'])
+    index_dir = asset_manager.index_dir(video_id) if BUILD_FRAME_INDEX else None
 
-    video_ids = [item['id'] for item in data['items']]
-    new_video_ids = [vid for vid in video_ids if vid not in processed_video_ids]
+    def on_progress(progress):
+        lease_keeper()
+        publisher(progress)
 
-    for video_id in new_video_ids:
-        process_video.delay(video_id)
+    try:
+        analyzer_obj = analyzer.ImageAnalyzer(video_path=video_path, target_image_path=target_image_path,
+                                              workers=ANALYZER_WORKERS, time_budget=ANALYZER_TIME_BUDGET,
+                                              progress_callback=on_progress, index_dir=index_dir)
+        started = time.time()
+        best_frame, best_frame_time = analyzer_obj.find_most_similar_frame()
+        metrics.observe_many({
+            'analysis_seconds': time.time() - started,
+            'decode_seconds': analyzer_obj.stage_times['decode'],
+            'signature_seconds': analyzer_obj.stage_times['signature'],
+            'feature_seconds': analyzer_obj.stage_times['feature'],
+            'match_seconds': analyzer_obj.stage_times['match'],
+            'frames_examined': analyzer_obj.examined_frames,
+        })
 
-    next_page_token = data.get('nextPageToken')
-    while next_page_token:
-        params['pageToken'] = next_page_token
-        response = requests.get(base_url, params=params)
-        data = response.json()
+        result = {
+            'videoId': video_id,
+            'best_frame_time': best_frame_time,
+            'truncated': analyzer_obj.truncated,
+            'coverage': analyzer_obj.coverage,
+            'message': 'Best frame found successfully' if best_frame is not None else 'Could not find the best frame'
+        }
+        payload['result'] = result
+    except Exception as e:
+        payload['result'] = {'error': str(e)}
+    return payload
 
-        video_ids = [item['id'] for item in data['items']]
-        new_video_ids = [vid for vid in video_ids if vid not in processed_video_ids]
+@app.task(bind=True)
+def persist_result(self, payload):
+    # 마지막 단계: 정리 후 process_video 와 같은 형식의 결과를 반환
+    video_id = payload['videoId']
+    result = payload['result']
+    if 'leaseOwner' in payload:
+        if 'error' not in result:
+            # 결과 저장 = 처리한 동영상으로 기록 (원자적 upsert)
+            result_store.upsert(video_id, result)
+        # 파일은 임대를 가진 작업만 지운다 (처리 중인 다른 작업의 파일을 건드리지 않도록)
+        asset_manager.release(video_id)
+        video_lease.release(video_id, payload['leaseOwner'])
+    inflight.release(video_id, payload['taskId'])
+    ProgressPublisher(self, progress_channel, task_id=payload['taskId']).finish(states.SUCCESS, result)
+    return result
+
+@app.task
+def pipeline_failed(request, exc, traceback, video_id, task_id):
+    # 체인의 link_error: 실패한 워커에서 바로 호출된다 (bind 하면 task_id 만 받는 예전 방식으로 호출됨).
+    # 처리 중 표시와 (아직 가지고 있다면) 임대/파일을 정리하고, 구독 중인 클라이언트에 실패를 알린다
+    logger.warning(f"Pipeline for {video_id} failed in {request.task}: {exc!r}")
+    if video_lease.owner(video_id) == task_id:
+        asset_manager.release(video_id)
+        video_lease.release(video_id, task_id)
+    inflight.release(video_id, task_id)
+    ProgressPublisher(pipeline_failed, progress_channel, task_id=task_id).finish(states.FAILURE, {'error': str(exc)})
 
-        for video_id in new_video_ids:
-            process_video.delay(video_id)
+@app.task(bind=True)
+def rematch_video(self, video_id):
+    # 썸네일이 바뀌었을 때 동영상을 다시 받지 않고 저장된 프레임 인덱스로 재매칭.
+    # 인덱스가 없으면 저장된 결과를 무시하고 다운로드부터 다시 분석한다
+    index_dir = asset_manager.index_dir(video_id)
+    if not FrameIndex.exists(index_dir):
+        raise self.replace(analysis_pipeline(video_id, self.request.id, refresh=True))
+    # 썸네일은 작업 공간이 아닌 임시 디렉터리에 받는다.
+    # 같은 동영상을 처리 중인 작업의 video.mp4/thumbnail.jpg 를 덮어쓰거나 지우지 않도록 임대 없이도 안전하다
+    with tempfile.TemporaryDirectory(prefix=f'rematch-{video_id}-') as thumbnail_dir:
+        try:
+            downloader.Downloader().execute_thumbnail(videoId=video_id, output_path=thumbnail_dir)
+            analyzer_obj = analyzer.ImageAnalyzer(video_path=None,
+                                                  target_image_path=os.path.join(thumbnail_dir, 'thumbnail.jpg'))
+            best_frame_time, best_similarity = analyzer_obj.query_index(index_dir)
+        except Exception as e:
+            return {'error': str(e)}
+
+    result = {
+        'videoId': video_id,
+        'best_frame_time': best_frame_time,
+        'message': 'Best frame found successfully' if best_frame_time is not None else 'Could not find the best frame'
+    }
+    result_store.upsert(video_id, result)
+    return result
+
+@app.task
+def fetch_and_download_videos():
+    # 모든 지역/카테고리를 동시에 크롤링하고, 결과가 없는 동영상만 한 번에 큐에 넣는다
+    video_ids = get_crawler().crawl()
+    new_video_ids = result_store.filter_new(video_ids)
+    logger.debug(f"Crawled {len(video_ids)} videos, {len(new_video_ids)} new")
 
-        next_page_token = data.get('nextPageToken')
+    # 크롤링 작업은 낮은 우선순위로, 분당 CRAWL_RATE_LIMIT 개씩 나눠 넣어 사용자 요청이 먼저 처리되도록 한다.
+    # CRAWL_WINDOW 안에 넣을 수 있는 만큼만 넣고 나머지는 결과가 없으므로 다음 크롤링에서 다시 걸러진다
+    if CRAWL_RATE_LIMIT:
+        limit = int(CRAWL_RATE_LIMIT * CRAWL_WINDOW / 60)
+        if len(new_video_ids) > limit:
+            logger.info(f"Deferring {len(new_video_ids) - limit} videos to the next crawl")
+            new_video_ids = new_video_ids[:limit]
+    submit_process_videos(new_video_ids, priority=CRAWL_PRIORITY, rate_limit=CRAWL_RATE_LIMIT)
 
 app.conf.beat_schedule = {
     'fetch-and-download-videos-every-hour': {
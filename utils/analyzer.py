@@ -158,124 +158,586 @@ import cv2
 import numpy as np
 import time
 import logging
-import matplotlib.pyplot as plt
+import math
+import queue
+import sys
+from utils.frame_source import FrameSource
+from utils.frame_index import FrameIndex, FrameIndexBuilder
+from utils import signature
+from utils.matcher import DescriptorMatcher
+from utils.sampling import get_sampling
+
+try:
+    # Celery prefork 워커(daemon 프로세스) 안에서도 자식 프로세스를 만들 수 있는 billiard 를 우선 사용
+    from billiard import Pool, Queue
+except ImportError:
+    from multiprocessing import Pool, Queue
 
-# 로깅 설정
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# 진행 상황 로그 최소 간격(초). 분석 루프 안에서 매 샘플마다 로그를 쓰지 않도록 제한
+LOG_INTERVAL = 5.0
+
+# 프로세스마다 한 번만 만드는 SIFT 검출기 (nfeatures 별). 작업마다 새로 만들지 않는다
+_detectors = {}
+
+
+def get_detector(nfeatures):
+    detector = _detectors.get(nfeatures)
+    if detector is None:
+        detector = _detectors[nfeatures] = cv2.SIFT_create(nfeatures=nfeatures)
+    return detector
+
+
+def warm_up(feature_budget=500):
+    """워커 프로세스 시작 시 검출기를 만들고 한 번 실행해 OpenCV 초기화 비용을 첫 작업 전에 치른다"""
+    sample = np.random.default_rng(0).integers(0, 255, (270, 480), dtype=np.uint8)
+    _, des = get_detector(feature_budget).detectAndCompute(sample, None)
+    DescriptorMatcher(des).score(des)
+
+# 세그먼트 하나가 최소한 가져야 하는 샘플 프레임 수 (너무 잘게 나누면 프로세스 비용이 더 크다)
+MIN_SAMPLES_PER_SEGMENT = 20
+
+# 캐스케이드 1단계에서 시그니처를 한 번에 비교하는 샘플 수 (조기 종료 확인 단위)
+CASCADE_CHUNK = 32
+
+# 이 길이(초)를 넘는 동영상은 계층적 탐색으로 분석
+LONG_VIDEO_SECONDS = 1800
+# 계층적 탐색 첫 단계의 샘플 수 (동영상 길이와 상관없이 거의 일정한 비용)
+LONG_VIDEO_SAMPLES = 600
+# 다음 단계에서 좁혀 볼 상위 구간 수와 단계마다 간격을 줄이는 비율
+HIERARCHY_BRANCHES = 3
+HIERARCHY_FACTOR = 8
+
+
+# 세그먼트 프로세스가 진행 상황을 부모 프로세스로 보내는 큐 (Pool initializer 로 설정)
+_progress_queue = None
+
+
+def set_progress_queue(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def scan_segment(video_path, target_image_path, options, start_idx, end_idx, deadline, index_options=None,
+                 segment=0):
+    """
+    별도 프로세스에서 자신만의 VideoCapture 로 한 세그먼트를 샘플링 비교한다.
+    index_options 를 주면 비교한 프레임의 인덱스 항목을 scan_state()['index_entries'] 로 돌려준다
+    """
+    # 진행 상황은 (세그먼트 번호, 진행률) 로 부모 프로세스의 큐에 넘긴다
+    progress_callback = (lambda progress: _progress_queue.put((segment, progress))) \
+        if _progress_queue is not None else None
+    segment_analyzer = ImageAnalyzer(video_path, target_image_path, progress_callback=progress_callback, **options)
+    segment_analyzer.reset_scan_state()
+    segment_analyzer.deadline = deadline
+    if index_options is not None:
+        segment_analyzer.index_builder = FrameIndexBuilder(**index_options)
+    segment_sampling = get_sampling(segment_analyzer.sampling, segment_analyzer.sampling_interval)
+    with FrameSource(video_path, decode_height=segment_analyzer.decode_height) as source:
+        best_frame_index, best_similarity = segment_analyzer.find_best_frame_in_range(
+            source, start_idx, end_idx, segment_analyzer.sampling_interval, source.frame_rate,
+            top_k=segment_analyzer.top_k, sampling=segment_sampling, early_exit=True)
+    return best_frame_index, best_similarity, segment_analyzer.scan_state()
+
 
 class ImageAnalyzer:
-    def __init__(self, video_path, target_image_path, sampling_interval=30):
+    def __init__(self, video_path, target_image_path, sampling_interval=30,
+                 signature_type='layout', top_k=8, refine_top_k=10, workers=1, sampling='stride',
+                 feature_budget=500, match_scale=True, decode_height=None, matcher='numpy',
+                 early_exit_ratio=0.8, time_budget=None, progress_callback=None, index_dir=None):
         self.video_path = video_path
         self.target_image_path = target_image_path
         self.sampling_interval = sampling_interval
 
-        # SIFT 알고리즘 초기화
-        self.sift = cv2.SIFT_create()
-        self.target_image = cv2.imread(self.target_image_path, cv2.IMREAD_GRAYSCALE)
-        self.target_kp, self.target_des = self.sift.detectAndCompute(self.target_image, None)
+        # 샘플링 전략: 'stride'(고정 간격), 'keyframe'(키프레임만), 'scene'(장면 전환 대표 프레임)
+        self.sampling = sampling
+
+        # 특징점 추출 설정
+        # feature_budget: 프레임당 최대 SIFT 특징점 수 (0 이면 제한 없음)
+        # match_scale: 프레임을 썸네일 크기로 줄인 뒤 특징점을 추출
+        # decode_height: 디코딩 직후 프레임을 줄일 높이 (None 이면 원본 해상도)
+        self.feature_budget = feature_budget
+        self.match_scale = match_scale
+        self.decode_height = decode_height
+
+        # 조기 종료 / 시간 예산 설정
+        # early_exit_ratio: 썸네일 특징점 중 좋은 매칭 비율이 이 값 이상인 프레임을 찾으면 샘플링을 멈춘다 (None 이면 끝까지)
+        # time_budget: 작업당 최대 분석 시간(초). 넘기면 그때까지의 최선 결과를 반환하고 truncated 를 True 로 표시
+        self.early_exit_ratio = early_exit_ratio
+        self.time_budget = time_budget
+
+        # index_dir: 주면 1단계에서 디코딩한 샘플 프레임으로 프레임 인덱스(FrameIndex)를 함께 만들어 저장한다.
+        # 인덱스가 동영상 전체를 덮도록 조기 종료하지 않으며, 시간 예산을 넘겨 잘린 경우에는 저장하지 않는다
+        self.index_dir = index_dir
+        self.index_builder = None
+        self.reset_scan_state()
+
+        # 진행 상황 콜백: {'stage', 'progress', 'elapsed', 'best_frame_time', 'best_similarity'} 를 받는다
+        self.progress_callback = progress_callback
+
+        # 세그먼트 병렬 분석 프로세스 수 (Celery --concurrency 와 함께 코어 수에 맞춰 조정)
+        self.workers = workers
+
+        # 세그먼트 프로세스에서 같은 설정으로 분석기를 다시 만들기 위한 옵션
+        self.options = {
+            'sampling_interval': sampling_interval,
+            'signature_type': signature_type,
+            'top_k': top_k,
+            'refine_top_k': refine_top_k,
+            'sampling': sampling,
+            'feature_budget': feature_budget,
+            'match_scale': match_scale,
+            'decode_height': decode_height,
+            'matcher': matcher,
+            'early_exit_ratio': early_exit_ratio,
+        }
+
+        # 후보 캐스케이드 설정: 1단계 전역 시그니처로 전체 프레임을 거르고, 상위 K개만 SIFT 로 비교
+        # top_k / refine_top_k 가 None 이면 해당 단계에서 모든 샘플 프레임에 SIFT 를 수행한다
+        self.signature_type = signature_type
+        self.top_k = top_k
+        self.refine_top_k = refine_top_k
+
+        # SIFT 알고리즘 (프로세스에서 만들어 둔 검출기를 재사용)
+        self.sift = get_detector(self.feature_budget)
+        self.target_color = cv2.imread(self.target_image_path)
+        self.target_image = cv2.cvtColor(self.target_color, cv2.COLOR_BGR2GRAY)
+
+        # 특징점과 전역 시그니처는 레터박스를 잘라낸 썸네일로 계산
+        trimmed_target = signature.trim_letterbox(self.target_color)
+        self.match_height = trimmed_target.shape[0]
+        self.target_kp, self.target_des = self.sift.detectAndCompute(
+            cv2.cvtColor(trimmed_target, cv2.COLOR_BGR2GRAY), None)
+        self.target_signature = signature.compute_signature(trimmed_target, self.signature_type)
 
         # 디스크립터 타입 확인 및 변환
         if self.target_des is not None and self.target_des.dtype != np.float32:
             self.target_des = self.target_des.astype(np.float32)
 
+        # 타겟 디스크립터는 분석 중 바뀌지 않으므로 매칭 엔진을 한 번만 만들어 둔다 ('numpy', 'flann', 'bf')
+        self.matcher = DescriptorMatcher(self.target_des, method=matcher)
+
     def preprocess_frame(self, frame):
         gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # 썸네일보다 큰 프레임은 썸네일 높이에 맞춰 줄인다 (특징점 수와 매칭 비용 감소)
+        if self.match_scale and gray_frame.shape[0] > self.match_height:
+            width = round(gray_frame.shape[1] * self.match_height / gray_frame.shape[0])
+            gray_frame = cv2.resize(gray_frame, (width, self.match_height), interpolation=cv2.INTER_AREA)
         return gray_frame
 
-    def calculate_similarity(self, des1, des2):
-        if des2 is None:
-            return float('inf')
+    def calculate_similarity(self, des):
+        # 값이 작을수록 유사도가 높음
+        return self.matcher.score(des)
+
+    def reset_scan_state(self):
+        # 분석 한 번의 진행 상태 (truncated: 시간 예산 초과, coverage: 전체 대비 실제로 비교한 샘플 비율)
+        # examined_frames 는 1단계에서 비교한 샘플 수, refined_frames 는 주변 프레임 정밀 비교에서 본 프레임 수
+        self.deadline = None if self.time_budget is None else time.time() + self.time_budget
+        self.truncated = False
+        self.early_exited = False
+        self.examined_frames = 0
+        self.refined_frames = 0
+        self.coverage = 0.0
+        self.stage = 'scan'
+        self.last_logged = 0.0
+        # 단계별 누적 시간(초): 디코딩, 전역 시그니처, SIFT 특징점 추출, 디스크립터 매칭
+        self.stage_times = {'decode': 0.0, 'signature': 0.0, 'feature': 0.0, 'match': 0.0}
+
+    def scan_state(self):
+        return {
+            'truncated': self.truncated,
+            'early_exited': self.early_exited,
+            'examined_frames': self.examined_frames,
+            'stage_times': self.stage_times,
+            'index_entries': self.index_builder.entries if self.index_builder is not None else None,
+        }
+
+    def log_progress(self, frame_idx, total_frames, start_time, best_similarity, best_frame_index, frame_rate):
+        elapsed_time = time.time() - start_time
+        # 프레임 수를 알 수 없는 스트림은 진행률 없이 보낸다
+        progress = (frame_idx + 1) / total_frames if total_frames else None
+        best_frame_time = best_frame_index / frame_rate
 
-        # 디스크립터 타입 확인 및 변환
-        if des2.dtype != np.float32:
-            des2 = des2.astype(np.float32)
-
-        bf = cv2.BFMatcher(cv2.NORM_L2, crossCheck=True)
-        matches = bf.match(des1, des2)
-        if not matches:
-            return float('inf')
-        distances = [m.distance for m in matches]
-        similarity = np.mean(distances)  # 거리가 작을수록 유사도가 높음
+        now = time.time()
+        if now - self.last_logged >= LOG_INTERVAL or (progress is not None and progress >= 1):
+            self.last_logged = now
+            progress_text = f"{progress * 100:.2f}%" if progress is not None else f"frame {frame_idx}"
+            logger.debug(f"Progress: {progress_text} | Elapsed Time: {elapsed_time:.2f}s "
+                         f"| Best Similarity: {best_similarity:.2f} | Best FrameTime: {best_frame_time:.2f}s")
+
+        if self.progress_callback is not None:
+            self.progress_callback({
+                'stage': self.stage,
+                'progress': round(progress * 100, 2) if progress is not None else None,
+                'elapsed': round(elapsed_time, 2),
+                'best_frame_time': best_frame_time if best_frame_index >= 0 else None,
+                'best_similarity': best_similarity if best_similarity != float('inf') else None,
+            })
+
+    def sift_similarity(self, gray_frame):
+        start = time.perf_counter()
+        kp, des = self.sift.detectAndCompute(gray_frame, None)
+        matched = time.perf_counter()
+        similarity = self.calculate_similarity(des)
+        self.stage_times['feature'] += matched - start
+        self.stage_times['match'] += time.perf_counter() - matched
         return similarity
 
-    def find_best_frame_in_range(self, cap, start_idx, end_idx, step, frame_rate):
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    def timed_frames(self, frames):
+        # 샘플 프레임을 꺼내는 데 걸린 시간(seek/grab/디코딩)을 누적
+        frames = iter(frames)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(frames)
+            except StopIteration:
+                return
+            finally:
+                self.stage_times['decode'] += time.perf_counter() - start
+            yield item
+
+    def frame_signature(self, frame):
+        start = time.perf_counter()
+        frame_signature = signature.compute_signature(frame, self.signature_type)
+        self.stage_times['signature'] += time.perf_counter() - start
+        return frame_signature
+
+    def is_confident(self, similarity):
+        """조기 종료 기준: 썸네일 특징점 중 좋은 매칭 비율이 early_exit_ratio 이상이면 충분히 찾은 것으로 본다"""
+        if self.early_exit_ratio is None:
+            return False
+        match_ratio = self.matcher.match_ratio(similarity)
+        return match_ratio is not None and match_ratio >= self.early_exit_ratio
+
+    def is_over_budget(self):
+        """작업 시간 예산을 넘겼는지 확인하고, 넘겼다면 결과가 잘렸음을 표시"""
+        if self.deadline is not None and time.time() > self.deadline:
+            self.truncated = True
+        return self.truncated
+
+    def merge_candidates(self, candidates, pending, top_k):
+        """1단계: 대기 중인 샘플의 전역 시그니처를 배치로 비교해 기존 후보와 합치고 상위 top_k 개만 남긴다"""
+        if not pending:
+            return candidates
+
+        start = time.perf_counter()
+        scores = signature.score_signatures(self.target_signature, np.stack([sig for _, sig, _ in pending]),
+                                            self.signature_type)
+        self.stage_times['signature'] += time.perf_counter() - start
+        merged = candidates + [(float(score), frame_idx, gray_frame)
+                               for score, (frame_idx, _, gray_frame) in zip(scores, pending)]
+        merged.sort(key=lambda candidate: (candidate[0], candidate[1]))
+        return merged[:top_k]
+
+    def match_candidates(self, candidates, matched, best_frame_index, best_similarity):
+        """2단계: 아직 SIFT 로 비교하지 않은 후보만 비교해 최선 결과를 갱신"""
+        for _, frame_idx, gray_frame in candidates:
+            if frame_idx in matched:
+                continue
+
+            similarity = self.sift_similarity(gray_frame)
+            matched[frame_idx] = similarity
+            if similarity < best_similarity:
+                best_similarity = similarity
+                best_frame_index = frame_idx
+
+        return best_frame_index, best_similarity
+
+    def find_best_frame_in_range(self, source, start_idx, end_idx, step, frame_rate, top_k=None, sampling=None,
+                                 early_exit=False, scores=None):
+        """scores 에 dict 를 넘기면 SIFT 로 비교한 모든 프레임의 유사도를 {frame_idx: 유사도} 로 채운다"""
+        total_frames = source.total_frames
         best_similarity = float('inf')  # 초기 유사도 값을 무한대로 설정
         best_frame_index = -1
         start_time = time.time()
 
-        for frame_idx in range(start_idx, end_idx, step):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            if not ret:
+        if sampling is None:
+            # 구간 시작에서 한 번만 seek 하고, 이후 건너뛸 프레임은 grab() 으로만 넘긴다
+            frames = source.iter_frames(start_idx, end_idx, step)
+        else:
+            frames = sampling.frames(source, start_idx, end_idx)
+
+        candidates = []  # 시그니처 상위 후보: (시그니처 점수, frame_idx, 전처리된 흑백 프레임)
+        pending = []  # 아직 시그니처 점수를 매기지 않은 샘플: (frame_idx, 시그니처, 전처리된 흑백 프레임)
+        matched = scores if scores is not None else {}  # 이미 SIFT 로 비교한 frame_idx 와 유사도
+        # 1단계 샘플 프레임을 인덱스에도 기록 (인덱스가 일부만 덮지 않도록 조기 종료하지 않는다)
+        index_builder = self.index_builder if self.stage == 'scan' else None
+        early_exit = early_exit and index_builder is None
+
+        for frame_idx, frame in self.timed_frames(frames):
+            if self.is_over_budget():
+                logger.debug("Time budget exceeded. Returning the best frame so far.")
+                break
+            if self.stage == 'scan':
+                self.examined_frames += 1
+            else:
+                self.refined_frames += 1
+            if index_builder is not None:
+                index_builder.add(frame_idx, frame)
+
+            if top_k is None:
+                # 캐스케이드 없이 모든 샘플 프레임을 SIFT 로 비교
+                similarity = self.sift_similarity(self.preprocess_frame(frame))
+                matched[frame_idx] = similarity
+                if similarity < best_similarity:
+                    best_similarity = similarity
+                    best_frame_index = frame_idx
+
+                if frame_idx % 2 == 0 or frame_idx + 1 == total_frames:  # 매 2프레임마다 출력
+                    self.log_progress(frame_idx, total_frames, start_time, best_similarity, best_frame_index,
+                                      frame_rate)
+            else:
+                pending.append((frame_idx, self.frame_signature(frame), self.preprocess_frame(frame)))
+                if len(pending) < CASCADE_CHUNK:
+                    continue
+
+                candidates = self.merge_candidates(candidates, pending, top_k)
+                pending = []
+                if early_exit:
+                    # 조기 종료를 확인하려면 새로 상위에 든 후보를 바로 SIFT 로 비교해야 한다
+                    best_frame_index, best_similarity = self.match_candidates(candidates, matched,
+                                                                              best_frame_index, best_similarity)
+                self.log_progress(frame_idx, total_frames, start_time, best_similarity, best_frame_index,
+                                  frame_rate)
+
+            if early_exit and self.is_confident(best_similarity):
+                logger.debug(f"Confident match at frame {best_frame_index}. Stopping scan early.")
+                self.early_exited = True
                 break
 
-            gray_frame = self.preprocess_frame(frame)
-            kp, des = self.sift.detectAndCompute(gray_frame, None)
-            similarity = self.calculate_similarity(self.target_des, des)
-
-            if similarity < best_similarity:
-                best_similarity = similarity
-                best_frame_index = frame_idx
-
-            if frame_idx % 2 == 0 or frame_idx == total_frames - 1:  # 매 2프레임마다 출력
-                elapsed_time = time.time() - start_time
-                progress = (frame_idx + 1) / total_frames
-                estimated_total_time = elapsed_time / progress
-                remaining_time = estimated_total_time - elapsed_time
-                best_frame_time = best_frame_index / frame_rate
+        if top_k is not None:
+            candidates = self.merge_candidates(candidates, pending, top_k)
+            best_frame_index, best_similarity = self.match_candidates(candidates, matched,
+                                                                      best_frame_index, best_similarity)
+            # 끝이 열린 구간(end_idx=None)을 끝까지 읽었다면 이제 프레임 수를 안다
+            total_frames = source.total_frames
+            if total_frames is not None:
+                end_idx = total_frames if end_idx is None else min(end_idx, total_frames)
+            if candidates and end_idx is not None and end_idx < sys.maxsize:
+                self.log_progress(end_idx - 1, total_frames, start_time, best_similarity, best_frame_index, frame_rate)
 
-                print(f"Progress: {progress * 100:.2f}% | Elapsed Time: {elapsed_time:.2f}s "
-                      f"| Best Similarity: {best_similarity:.2f} | Best FrameTime: {best_frame_time:.2f}s")
-                logger.debug(f"Progress: {progress * 100:.2f}% | Elapsed Time: {elapsed_time:.2f}s "
-                             f"| Best Similarity: {best_similarity:.2f} | Best FrameTime: {best_frame_time:.2f}s")
+        return best_frame_index, best_similarity
 
+    def split_segments(self, total_frames):
+        """샘플링 간격에 맞춰 프레임 범위를 workers 개 이하의 세그먼트로 나눈다"""
+        if not total_frames:
+            # 프레임 수를 알 수 없는 동영상(스트림 등)은 나누지 않고 끝까지 읽는다
+            return [(0, None)]
+        total_samples = math.ceil(total_frames / self.sampling_interval)
+        segment_count = max(1, min(self.workers, total_samples // MIN_SAMPLES_PER_SEGMENT))
+        segment_frames = math.ceil(total_samples / segment_count) * self.sampling_interval
+        return [(start_idx, min(total_frames, start_idx + segment_frames))
+                for start_idx in range(0, total_frames, segment_frames)]
+
+    def scan_segments(self, source, total_frames, frame_rate, frame_sampling):
+        segments = self.split_segments(total_frames)
+        if len(segments) == 1:
+            return self.find_best_frame_in_range(source, 0, total_frames, self.sampling_interval, frame_rate,
+                                                 top_k=self.top_k, sampling=frame_sampling, early_exit=True)
+
+        logger.debug(f"Scanning {len(segments)} segments in parallel")
+        options = dict(self.options, sampling=frame_sampling.name)
+        index_options = self.index_builder.options if self.index_builder is not None else None
+        args = [(self.video_path, self.target_image_path, options, start_idx, end_idx, self.deadline, index_options,
+                 segment) for segment, (start_idx, end_idx) in enumerate(segments)]
+        if self.progress_callback is None:
+            with Pool(processes=len(segments)) as pool:
+                results = pool.starmap(scan_segment, args)
+        else:
+            # 세그먼트 프로세스의 진행 상황을 큐로 받아 전체 진행률로 합쳐 전달
+            progress_queue = Queue()
+            with Pool(processes=len(segments), initializer=set_progress_queue, initargs=(progress_queue,)) as pool:
+                async_result = pool.starmap_async(scan_segment, args)
+                self.relay_segment_progress(progress_queue, async_result, segments, total_frames)
+                results = async_result.get()
+
+        self.truncated = any(state['truncated'] for _, _, state in results)
+        self.early_exited = any(state['early_exited'] for _, _, state in results)
+        self.examined_frames += sum(state['examined_frames'] for _, _, state in results)
+        for _, _, state in results:
+            for stage, seconds in state['stage_times'].items():
+                self.stage_times[stage] += seconds
+            if self.index_builder is not None:
+                self.index_builder.merge(state['index_entries'])
+
+        # 세그먼트별 최선 결과 중 가장 유사한 프레임을 선택
+        best_frame_index, best_similarity, _ = min(results, key=lambda result: result[1])
         return best_frame_index, best_similarity
 
-    def find_most_similar_frame(self):
-        cap = cv2.VideoCapture(self.video_path)
-        if not cap.isOpened():
+    def relay_segment_progress(self, progress_queue, async_result, segments, total_frames):
+        """세그먼트가 모두 끝날 때까지 세그먼트별 마지막 진행 상황을 모아 progress_callback 으로 전달한다"""
+        start_time = time.time()
+        latest = {}
+        while True:
+            done = async_result.ready()
+            try:
+                # 끝난 뒤에는 큐에 남은 것만 비운다
+                segment, progress = progress_queue.get(timeout=0 if done else 0.5)
+            except queue.Empty:
+                if done:
+                    return
+                continue
+            latest[segment] = progress
+
+            # 전체 진행률: 세그먼트마다 처리한 프레임 수의 합
+            processed = 0
+            for index, segment_progress in latest.items():
+                start_idx, end_idx = segments[index]
+                position = segment_progress['progress'] / 100 * total_frames
+                processed += min(max(position - start_idx, 0), end_idx - start_idx)
+            found = [segment_progress for segment_progress in latest.values()
+                     if segment_progress['best_similarity'] is not None]
+            best = min(found, key=lambda segment_progress: segment_progress['best_similarity']) if found else None
+            self.progress_callback({
+                'stage': self.stage,
+                'progress': round(processed / total_frames * 100, 2),
+                'elapsed': round(time.time() - start_time, 2),
+                'best_frame_time': best['best_frame_time'] if best else None,
+                'best_similarity': best['best_similarity'] if best else None,
+            })
+
+    def hierarchical_search(self, source, total_frames, frame_rate):
+        """
+        긴 동영상용 탐색. 아주 듬성듬성 샘플링한 뒤 유사도가 높은 구간만 간격을 줄여 가며 다시 샘플링한다.
+        첫 단계 간격을 길이에 맞춰 정하므로 동영상 길이와 상관없이 비교하는 샘플 수가 거의 일정하다.
+        """
+        stride = max(self.sampling_interval, math.ceil(total_frames / LONG_VIDEO_SAMPLES))
+        regions = [(0, total_frames)]
+        best_frame_index, best_similarity = -1, float('inf')
+
+        while True:
+            scores = {}
+            for start_idx, end_idx in regions:
+                self.find_best_frame_in_range(source, start_idx, end_idx, stride, frame_rate, top_k=self.top_k,
+                                              early_exit=True, scores=scores)
+                if self.truncated or self.early_exited:
+                    break
+
+            ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]))
+            if ranked and ranked[0][1] < best_similarity:
+                best_frame_index, best_similarity = ranked[0]
+
+            logger.debug(f"Hierarchical search stride {stride}: {len(regions)} regions, "
+                         f"best frame {best_frame_index}")
+            if stride == self.sampling_interval or not ranked or self.truncated or self.early_exited:
+                return best_frame_index, best_similarity
+
+            # 상위 구간 주변을 더 좁은 간격으로 다시 샘플링 (겹치는 구간은 합친다)
+            windows = sorted((max(0, frame_idx - stride), min(total_frames, frame_idx + stride))
+                             for frame_idx, _ in ranked[:HIERARCHY_BRANCHES])
+            regions = [windows[0]]
+            for start_idx, end_idx in windows[1:]:
+                if start_idx <= regions[-1][1]:
+                    regions[-1] = (regions[-1][0], max(regions[-1][1], end_idx))
+                else:
+                    regions.append((start_idx, end_idx))
+            stride = max(self.sampling_interval, stride // HIERARCHY_FACTOR)
+
+    def find_most_similar_frame(self, sampling=None):
+        # sampling 을 지정하면 이번 호출에서만 해당 샘플링 전략을 사용
+        frame_sampling = get_sampling(sampling or self.sampling, self.sampling_interval)
+
+        # 작업 시간 예산: 넘기면 그때까지의 최선 결과를 반환하고 truncated 를 표시
+        self.reset_scan_state()
+        self.index_builder = FrameIndexBuilder(self.sampling_interval) if self.index_dir else None
+
+        source = FrameSource(self.video_path, decode_height=self.decode_height)
+        if not source.is_opened():
             logger.debug("Error: Could not open video.")
             return None, None
 
-        frame_rate = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        video_duration = total_frames / frame_rate
-
-        if video_duration > 1800:  # 동영상 길이가 30분(1800초) 이상이면
-            logger.debug("Video is longer than 30 minutes. Skipping analysis.")
-            return None, -1
+        frame_rate = source.frame_rate
+        # None 이면 프레임 수를 알 수 없는 스트림: 끝까지 읽으며 한 번에 훑는다
+        total_frames = source.total_frames
+        video_duration = total_frames / frame_rate if total_frames else 0.0
 
         start_time = time.time()
 
-        # 샘플링된 프레임에서 가장 유사한 프레임을 찾기
-        best_frame_index, best_similarity = self.find_best_frame_in_range(cap, 0, total_frames, self.sampling_interval,
-                                                                          frame_rate)
+        if video_duration > LONG_VIDEO_SECONDS:  # 동영상 길이가 30분(1800초) 이상이면
+            # 길이에 맞춘 간격으로 듬성듬성 샘플링한 뒤 구간을 좁혀 가는 계층적 탐색
+            logger.debug("Video is longer than 30 minutes. Using hierarchical search.")
+            frame_sampling = get_sampling('stride', self.sampling_interval)
+            best_frame_index, best_similarity = self.hierarchical_search(source, total_frames, frame_rate)
+        else:
+            # 샘플링된 프레임에서 가장 유사한 프레임을 찾기 (충분히 유사한 프레임을 찾으면 조기 종료)
+            best_frame_index, best_similarity = self.scan_segments(source, total_frames, frame_rate,
+                                                                   frame_sampling)
+
+        # 고정 간격으로 전체를 샘플링했을 때 대비 실제로 비교한 샘플 비율 (끝까지 읽지 못한 스트림은 알 수 없음)
+        total_frames = source.total_frames
+        if total_frames:
+            self.coverage = min(1.0, self.examined_frames / math.ceil(total_frames / self.sampling_interval))
+        else:
+            self.coverage = None
+
+        if self.index_builder is not None:
+            if self.truncated:
+                logger.debug("Scan was truncated. Not writing the frame index.")
+            else:
+                self.index_builder.write(self.index_dir, frame_rate, total_frames)
+            self.index_builder = None
+
+        if best_frame_index < 0:
+            logger.debug("Error: No frame could be compared.")
+            source.release()
+            return None, None
 
-        # 주변 프레임을 세밀하게 비교
-        start_idx = max(0, best_frame_index - self.sampling_interval)
-        end_idx = min(total_frames, best_frame_index + self.sampling_interval)
-        best_frame_index, best_similarity = self.find_best_frame_in_range(cap, start_idx, end_idx, 1, frame_rate)
+        # 주변 프레임을 세밀하게 비교 (구간 전체에 seek 한 번). 시간 예산을 넘겼다면 생략
+        self.stage = 'refine'
+        if not self.truncated:
+            start_idx, end_idx = frame_sampling.refine_window(source, best_frame_index, total_frames or sys.maxsize)
+            refined_index, refined_similarity = self.find_best_frame_in_range(source, start_idx, end_idx, 1,
+                                                                              frame_rate, top_k=self.refine_top_k)
+            if refined_index >= 0:
+                best_frame_index = refined_index
 
         elapsed_time = time.time() - start_time
-        logger.debug(f"Total elapsed time: {elapsed_time:.2f}s")
+        coverage_text = f"{self.coverage * 100:.1f}%" if self.coverage is not None else 'unknown'
+        logger.debug(f"Total elapsed time: {elapsed_time:.2f}s | Coverage: {coverage_text}")
 
         best_frame_time = best_frame_index / frame_rate
 
         # 해당 프레임 추출
-        cap.set(cv2.CAP_PROP_POS_FRAMES, best_frame_index)
-        ret, best_frame = cap.read()
-        if not ret:
+        best_frame = source.read_frame(best_frame_index)
+        source.release()
+        if best_frame is None:
             logger.debug("Error: Could not read the best frame.")
             return None, None
 
-        cap.release()
-
         return best_frame, best_frame_time
 
+    def query_index(self, index_dir, top_k=None):
+        """
+        동영상 없이 저장된 프레임 인덱스(FrameIndex)만으로 썸네일과 가장 유사한 시간을 찾는다.
+        시그니처로 상위 top_k 개를 고르고, 디스크립터가 저장돼 있으면 그 후보만 SIFT 디스크립터로 다시 비교한다.
+        """
+        index = FrameIndex.open(index_dir)
+        if self.signature_type not in index.signatures:
+            raise ValueError(f"Signature type {self.signature_type} is not stored in {index_dir}")
+
+        scores = signature.score_signatures(self.target_signature, index.signatures[self.signature_type],
+                                            self.signature_type)
+        if len(scores) == 0:
+            return None, float('inf')
+
+        order = np.argsort(scores, kind='stable')[:top_k or self.top_k or len(scores)]
+        if not index.has_descriptors:
+            return float(index.times[order[0]]), float(scores[order[0]])
+
+        best_position, best_similarity = order[0], float('inf')
+        for position in order:
+            similarity = self.calculate_similarity(index.frame_descriptors(position))
+            if similarity < best_similarity:
+                best_position, best_similarity = position, similarity
+
+        return float(index.times[best_position]), best_similarity
+
     def display_comparison(self, best_frame):
+        # 디버깅용 시각화에서만 쓰므로 워커/API 프로세스가 시작할 때 불러오지 않는다
+        import matplotlib.pyplot as plt
+
         best_frame_gray = cv2.cvtColor(best_frame, cv2.COLOR_BGR2GRAY)
 
         # 타겟 이미지와 가장 유사한 프레임 시각적으로 비교
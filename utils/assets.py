@@ -0,0 +1,176 @@
+import os
+import glob
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 다운로드한 동영상/썸네일을 둘 작업 공간 (예: tmpfs 인 /dev/shm/thumbnail). 결과 DB 는 assets/ 에 남는다
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR', 'assets')
+# 프레임 인덱스를 남길 디렉터리. rematch_video 는 어느 호스트에서나 실행되므로 여러 호스트면 공유 저장소로 지정
+INDEX_DIR = os.environ.get('INDEX_DIR', 'assets')
+# 작업 공간 전체 용량 한도 (MB)
+SCRATCH_QUOTA_MB = int(os.environ.get('SCRATCH_QUOTA_MB', 4096))
+# 용량이 날 때까지 다운로드가 기다리는 최대 시간(초)
+QUOTA_WAIT_TIMEOUT = 600
+# 처리 중이 아닌데 이 시간(초)보다 오래된 파일은 sweep() 이 지운다
+ORPHAN_AGE = 1800
+# maybe_sweep() 이 실제로 sweep 하는 최소 간격(초)
+SWEEP_INTERVAL = 600
+
+ASSET_FILES = ('video.mp4', 'thumbnail.jpg')
+
+
+class AssetManager:
+    """
+    다운로드 작업 공간 관리자.
+
+    동영상별 디렉터리(<scratch>/<videoId>/)에 video.mp4 / thumbnail.jpg 를 두고,
+    - reserve(): 받기 전에 용량을 예약한다. 한도를 넘으면 처리 중이 아닌 파일을 오래된 순(LRU)으로 지우고,
+      그래도 모자라면 용량이 날 때까지 기다린다.
+    - release(): 작업이 끝나면(성공/실패 모두) 파일을 지운다.
+    - sweep(): 워커가 죽어 남은 파일과 예전 .lock 파일을 지운다. 작업 공간은 호스트마다 따로 있으므로
+      각 호스트의 다운로드 워커가 maybe_sweep() 으로 주기적으로 자기 작업 공간을 정리한다.
+    is_active(video_id) 는 처리 중인 동영상인지 알려 주는 함수로, 처리 중인 파일은 지우지 않는다.
+    예약은 프로세스 안에서만 공유되므로 호스트마다 다운로드 워커를 하나(스레드 풀)로 둔다.
+    """
+
+    def __init__(self, scratch_dir=SCRATCH_DIR, quota_bytes=SCRATCH_QUOTA_MB * 1024 * 1024, is_active=None,
+                 index_root=INDEX_DIR):
+        self.scratch_dir = scratch_dir
+        self.index_root = index_root
+        self.quota_bytes = quota_bytes
+        self.is_active = is_active or (lambda video_id: False)
+        self.reserved = {}  # video_id -> 아직 다 받지 않은 예약 바이트
+        self.condition = threading.Condition()
+        self.last_swept = 0.0
+
+    def video_dir(self, video_id):
+        return os.path.join(self.scratch_dir, video_id)
+
+    def video_path(self, video_id):
+        return os.path.join(self.video_dir(video_id), 'video.mp4')
+
+    def thumbnail_path(self, video_id):
+        return os.path.join(self.video_dir(video_id), 'thumbnail.jpg')
+
+    def index_dir(self, video_id):
+        # 작업이 끝나도 지우지 않는 프레임 인덱스 (<index_root>/<videoId>/index)
+        return os.path.join(self.index_root, video_id, 'index')
+
+    def asset_files(self):
+        """작업 공간의 (video_id, 경로, 크기, 마지막 접근 시각) 목록"""
+        files = []
+        for name in ASSET_FILES:
+            for path in glob.glob(os.path.join(self.scratch_dir, '*', name)):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                video_id = os.path.basename(os.path.dirname(path))
+                files.append((video_id, path, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+        return files
+
+    def usage(self):
+        return sum(size for _, _, size, _ in self.asset_files())
+
+    def evict(self, needed_bytes, exclude=None):
+        """처리 중이 아닌 파일을 오래된 순으로 needed_bytes 만큼 지우고 지운 바이트 수를 반환"""
+        idle = [(path, size) for video_id, path, size, _ in sorted(self.asset_files(), key=lambda file: file[3])
+                if video_id != exclude and video_id not in self.reserved and not self.is_active(video_id)]
+        # 다 지워도 모자라면 아무것도 지우지 않는다
+        if sum(size for _, size in idle) < needed_bytes:
+            return 0
+
+        freed = 0
+        for path, size in idle:
+            if freed >= needed_bytes:
+                break
+            self.remove_file(path)
+            freed += size
+        if freed:
+            logger.debug(f"Evicted {freed / 1024 / 1024:.1f}MB from {self.scratch_dir}")
+        return freed
+
+    def reserve(self, video_id, size, timeout=QUOTA_WAIT_TIMEOUT):
+        """size 바이트를 받을 자리를 예약한다. timeout 안에 자리가 나지 않으면 TimeoutError"""
+        size = size or 0
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                in_use = self.usage() + sum(self.reserved.values())
+                over = in_use + size - self.quota_bytes
+                if over <= 0 or self.evict(over, exclude=video_id) >= over:
+                    self.reserved[video_id] = size
+                    os.makedirs(self.video_dir(video_id), exist_ok=True)
+                    return
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No scratch space for {video_id} ({size / 1024 / 1024:.1f}MB)")
+                logger.debug(f"Scratch quota reached. Waiting for space for {video_id}")
+                # 다른 작업이 release() 하면 깨어나고, 처리 중 표시가 풀린 파일을 위해 주기적으로도 다시 확인
+                self.condition.wait(min(remaining, 5.0))
+
+    def commit(self, video_id):
+        # 다 받은 파일은 usage() 에 잡히므로 예약을 푼다
+        with self.condition:
+            self.reserved.pop(video_id, None)
+
+    def release(self, video_id):
+        """동영상/썸네일을 지운다 (인덱스 등 다른 파일이 없으면 디렉터리도 지운다)"""
+        with self.condition:
+            self.reserved.pop(video_id, None)
+            for name in ASSET_FILES:
+                self.remove_file(os.path.join(self.video_dir(video_id), name))
+            self.condition.notify_all()
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        directory = os.path.dirname(path)
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # 비어 있지 않음 (다른 파일이나 인덱스가 남아 있음)
+
+    def maybe_sweep(self, interval=SWEEP_INTERVAL):
+        """마지막 sweep 후 interval 초가 지났을 때만 sweep() 한다"""
+        with self.condition:
+            now = time.time()
+            if now - self.last_swept < interval:
+                return 0
+            self.last_swept = now
+        return self.sweep()
+
+    def sweep(self, max_age=ORPHAN_AGE):
+        """처리 중이 아닌 오래된 파일과 .lock 파일을 지우고 지운 파일 수를 반환"""
+        removed = 0
+        now = time.time()
+        for video_id, path, _, accessed in self.asset_files():
+            if now - accessed < max_age or video_id in self.reserved or self.is_active(video_id):
+                continue
+            self.remove_file(path)
+            removed += 1
+
+        # 예전 FileLock 이 남긴 assets/<videoId>.lock 과 비어 있는 동영상 디렉터리
+        for path in glob.glob(os.path.join(self.scratch_dir, '*.lock')):
+            if now - os.path.getmtime(path) >= max_age:
+                os.remove(path)
+                removed += 1
+        for directory in glob.glob(os.path.join(self.scratch_dir, '*', '')):
+            video_id = os.path.basename(os.path.dirname(directory))
+            if not os.listdir(directory) and not self.is_active(video_id) and video_id not in self.reserved:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+
+        if removed:
+            logger.debug(f"Swept {removed} orphaned files from {self.scratch_dir}")
+        with self.condition:
+            self.condition.notify_all()
+        return removed
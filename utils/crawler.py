@@ -0,0 +1,138 @@
+import json
+import redis
+import requests
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from celery_config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_VIDEOS_URL = 'https://www.googleapis.com/youtube/v3/videos'
+
+# mostPopular 한 페이지 최대 크기 (요청 수를 줄이기 위해 최대로)
+MAX_RESULTS = 50
+REQUEST_TIMEOUT = (5, 15)  # (연결, 읽기) 초
+# 갱신되지 않은 페이지는 ETag 로 304 를 받으므로 캐시는 다음 크롤링까지만 유지하면 충분
+ETAG_TTL = 2 * 3600
+
+
+class MemoryEtagCache:
+    """프로세스 안에서만 유지되는 ETag 캐시 (테스트/단독 실행용)"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, etag, page):
+        self.entries[key] = (etag, page)
+
+
+class RedisEtagCache:
+    """워커 프로세스가 바뀌어도 유지되는 ETag 캐시 (Redis)"""
+
+    def __init__(self, redis_url=REDIS_URL, prefix='crawler:etag:', ttl=ETAG_TTL):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.redis.get(f'{self.prefix}{key}')
+        if value is None:
+            return None
+        entry = json.loads(value)
+        return entry['etag'], entry['page']
+
+    def set(self, key, etag, page):
+        # page = [video_ids, next_page_token]
+        self.redis.set(f'{self.prefix}{key}', json.dumps({'etag': etag, 'page': page}), ex=self.ttl)
+
+
+class TrendingCrawler:
+    """
+    YouTube 인기 동영상(mostPopular) 크롤러.
+
+    지역/카테고리마다 페이지를 순서대로 넘기되 지역/카테고리끼리는 동시에 요청한다.
+    연결은 하나의 Session 풀을 재사용하고, 페이지마다 ETag 를 기억해 두었다가 If-None-Match 로
+    다시 요청하므로 바뀌지 않은 페이지는 본문 없이 304 로 끝난다.
+    base_url 을 바꾸면 로컬 스텁 서버를 상대로 실행할 수 있다.
+    """
+
+    def __init__(self, api_key, regions=('KR',), categories=(None,), base_url=YOUTUBE_VIDEOS_URL,
+                 cache=None, max_results=MAX_RESULTS, timeout=REQUEST_TIMEOUT, max_workers=8):
+        self.api_key = api_key
+        self.regions = list(regions)
+        self.categories = list(categories) or [None]
+        self.base_url = base_url
+        self.cache = cache if cache is not None else MemoryEtagCache()
+        self.max_results = max_results
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def cache_key(self, region, category, page_token):
+        return f'{region}:{category or "all"}:{page_token or "first"}'
+
+    def fetch_page(self, region, category, page_token=None):
+        """페이지 하나를 가져와 (video_ids, next_page_token) 을 반환한다"""
+        params = {
+            'part': 'id',
+            'chart': 'mostPopular',
+            'regionCode': region,
+            'maxResults': self.max_results,
+            'key': self.api_key,
+        }
+        if category:
+            params['videoCategoryId'] = category
+        if page_token:
+            params['pageToken'] = page_token
+
+        key = self.cache_key(region, category, page_token)
+        cached = self.cache.get(key)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+
+        response = self.session.get(self.base_url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            video_ids, next_page_token = cached[1]
+            return video_ids, next_page_token
+        response.raise_for_status()
+
+        data = response.json()
+        video_ids = [item['id'] for item in data.get('items', [])]
+        next_page_token = data.get('nextPageToken')
+        if response.headers.get('ETag'):
+            self.cache.set(key, response.headers['ETag'], [video_ids, next_page_token])
+        return video_ids, next_page_token
+
+    def crawl_chart(self, region, category):
+        video_ids = []
+        page_token = None
+        while True:
+            page_ids, page_token = self.fetch_page(region, category, page_token)
+            video_ids.extend(page_ids)
+            if not page_token:
+                return video_ids
+
+    def crawl(self):
+        """모든 지역/카테고리의 인기 동영상 id 를 중복 없이 반환한다 (실패한 지역/카테고리는 건너뜀)"""
+        charts = [(region, category) for region in self.regions for category in self.categories]
+
+        def crawl_safely(chart):
+            try:
+                return self.crawl_chart(*chart)
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"Failed to crawl {chart}: {e}")
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(charts))) as executor:
+            results = list(executor.map(crawl_safely, charts))
+
+        video_ids = list(dict.fromkeys(video_id for chart_ids in results for video_id in chart_ids))
+        logger.debug(f"Crawled {len(video_ids)} videos from {len(charts)} charts")
+        return video_ids
@@ -2,35 +2,93 @@
 from pytubefix import YouTube
 import requests
 import logging
+import os
 
-# 로깅 설정
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# 분석에 필요한 최소 세로 해상도. 썸네일(480x360)과 비교하므로 그보다 큰 스트림은 대역폭/디코딩 낭비
+MIN_STREAM_HEIGHT = int(os.environ.get('DOWNLOAD_MIN_HEIGHT', 360))
+
+
+def stream_height(stream):
+    # '360p' -> 360 (오디오 스트림은 None)
+    if not stream.resolution:
+        return None
+    return int(stream.resolution.rstrip('p'))
+
+
 class Downloader:
-    def __init__(self):
+    def __init__(self, min_height=MIN_STREAM_HEIGHT):
         self.video_uri = 'https://www.youtube.com/watch?v='
+        self.min_height = min_height
 
-    def execute(self, videoId):
-        yt = YouTube(self.video_uri+videoId)
-        stream = yt.streams.filter(res='720p', file_extension='mp4', progressive=True).first()
+    def select_stream(self, yt):
+        """
+        min_height 이상인 mp4 영상 스트림 중 가장 작은 것을 고른다 (video-only adaptive 스트림 포함).
+        같은 해상도면 OpenCV 가 확실히 디코딩하는 H.264(avc1), progressive 순으로 우선하고,
+        min_height 이상인 스트림이 없으면 가장 큰 스트림을 쓴다.
+        """
+        streams = [stream for stream in yt.streams.filter(file_extension='mp4')
+                   if stream.includes_video_track and stream_height(stream)]
+        if not streams:
+            return None
 
-        if not stream:
-            # 720p progressive 스트림이 없다면 다른 해상도로 대체합니다.
-            stream = yt.streams.filter(file_extension='mp4', progressive=True).order_by('resolution').desc().first()
-            logger.debug(f"No 720p progressive stream found. Using {stream.resolution} stream instead.")
+        def preference(stream):
+            codec = stream.video_codec or ''
+            return not codec.startswith('avc1'), not stream.is_progressive
+
+        sufficient = [stream for stream in streams if stream_height(stream) >= self.min_height]
+        if sufficient:
+            return min(sufficient, key=lambda stream: (stream_height(stream), preference(stream)))
+        stream = min(streams, key=lambda stream: (-stream_height(stream), preference(stream)))
+        logger.debug(f"No stream >= {self.min_height}p found. Using {stream.resolution} stream instead.")
+        return stream
+
+    def execute(self, videoId, output_path=None, reserve=None):
+        """
+        output_path(기본 assets/<videoId>)에 video.mp4 와 thumbnail.jpg 를 받는다.
+        reserve 를 주면 받기 전에 reserve(예상 바이트) 를 호출한다 (용량이 날 때까지 기다리는 데 사용)
+        """
+        output_path = output_path or f'assets/{videoId}'
+        yt = YouTube(self.video_uri+videoId)
+        stream = self.select_stream(yt)
 
         if stream:
-            stream.download(output_path=f'assets/{videoId}', filename='video.mp4')
-            logger.debug("Download complete")
+            if reserve is not None:
+                reserve(stream.filesize)
+            stream.download(output_path=output_path, filename='video.mp4')
+            logger.debug(f"Download complete ({stream.resolution}, {stream.video_codec})")
 
             # 썸네일 다운로드
-            self.download_thumbnail(yt.thumbnail_url, videoId)
+            self.download_thumbnail(yt.thumbnail_url, output_path)
+
+    def open_stream(self, videoId, output_path=None):
+        """
+        동영상을 디스크에 받지 않고 분석할 스트림 URL 을 반환한다 (썸네일만 받는다).
+        FFmpeg 가 URL 을 받는 대로 디코딩하므로 다운로드와 분석이 겹친다. 스트림이 없으면 None
+        """
+        yt = YouTube(self.video_uri+videoId)
+        stream = self.select_stream(yt)
+        if not stream:
+            return None
+
+        output_path = output_path or f'assets/{videoId}'
+        os.makedirs(output_path, exist_ok=True)
+        self.download_thumbnail(yt.thumbnail_url, output_path)
+        logger.debug(f"Streaming {stream.resolution} ({stream.video_codec})")
+        return stream.url
+
+    def execute_thumbnail(self, videoId, output_path=None):
+        # 동영상 없이 썸네일만 다시 받는다 (프레임 인덱스 재매칭용)
+        output_path = output_path or f'assets/{videoId}'
+        yt = YouTube(self.video_uri+videoId)
+        os.makedirs(output_path, exist_ok=True)
+        self.download_thumbnail(yt.thumbnail_url, output_path)
 
-    def download_thumbnail(self, thumbnail_url, videoId):
+    def download_thumbnail(self, thumbnail_url, output_path):
         response = requests.get(thumbnail_url)
         if response.status_code == 200:
-            with open(f'assets/{videoId}/thumbnail.jpg', 'wb') as f:
+            with open(os.path.join(output_path, 'thumbnail.jpg'), 'wb') as f:
                 f.write(response.content)
             logger.debug("Thumbnail download complete")
         else:
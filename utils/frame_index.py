@@ -0,0 +1,141 @@
+import cv2
+import json
+import os
+import numpy as np
+import logging
+from utils import signature
+
+logger = logging.getLogger(__name__)
+
+# 인덱스에 저장하는 전역 시그니처 종류
+INDEX_SIGNATURES = ('layout', 'phash')
+# 프레임당 저장하는 최대 SIFT 디스크립터 수
+INDEX_DESCRIPTORS = 64
+# 디스크립터를 추출할 프레임 높이 (레터박스를 뺀 480x360 썸네일 높이)
+INDEX_FRAME_HEIGHT = 270
+
+
+class FrameIndex:
+    """
+    동영상 하나의 프레임 시그니처 인덱스 (assets/<videoId>/index/).
+
+    샘플 프레임의 인덱스/시간과 전역 시그니처, 프레임당 최대 INDEX_DESCRIPTORS 개의 SIFT 디스크립터를
+    .npy 로 저장하고 memory-map 으로 읽는다. 썸네일이 바뀌어도 동영상을 다시 받지 않고 재매칭할 수 있다.
+    """
+
+    def __init__(self, index_dir, meta, frames, signatures, descriptors, descriptor_counts):
+        self.index_dir = index_dir
+        self.meta = meta
+        self.frames = frames
+        self.signatures = signatures
+        self.descriptors = descriptors
+        self.descriptor_counts = descriptor_counts
+
+    @property
+    def times(self):
+        return self.frames / self.meta['frame_rate']
+
+    @property
+    def has_descriptors(self):
+        return self.descriptors is not None
+
+    def frame_descriptors(self, position):
+        if not self.has_descriptors:
+            return None
+        count = int(self.descriptor_counts[position])
+        if count == 0:
+            return None
+        return np.asarray(self.descriptors[position, :count], dtype=np.float32)
+
+    @staticmethod
+    def exists(index_dir):
+        return os.path.exists(os.path.join(index_dir, 'meta.json'))
+
+    @classmethod
+    def open(cls, index_dir):
+        with open(os.path.join(index_dir, 'meta.json'), 'r') as file:
+            meta = json.load(file)
+
+        def load(name):
+            path = os.path.join(index_dir, f'{name}.npy')
+            return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+        signatures = {signature_type: load(f'signature_{signature_type}') for signature_type in meta['signatures']}
+        return cls(index_dir, meta, load('frames'), signatures, load('descriptors'), load('descriptor_counts'))
+
+
+class FrameIndexBuilder:
+    """
+    FrameIndex 를 만들기 위해 샘플 프레임의 시그니처/디스크립터를 모은다.
+
+    분석기가 이미 디코딩한 프레임을 add() 로 넘기면 인덱스를 위해 동영상을 다시 읽지 않아도 된다.
+    entries 는 pickle 가능하므로 세그먼트 프로세스가 모은 것을 merge() 로 합칠 수 있다.
+    """
+
+    def __init__(self, sampling_interval=30, signature_types=INDEX_SIGNATURES, descriptors=INDEX_DESCRIPTORS):
+        self.sampling_interval = sampling_interval
+        self.signature_types = tuple(signature_types)
+        self.descriptors = descriptors
+        self.sift = cv2.SIFT_create(nfeatures=descriptors) if descriptors else None
+        self.entries = []  # (frame_idx, {시그니처 종류: 값}, 디스크립터, 디스크립터 수)
+
+    @property
+    def options(self):
+        # 세그먼트 프로세스에서 같은 설정으로 다시 만들기 위한 인자
+        return {'sampling_interval': self.sampling_interval, 'signature_types': self.signature_types,
+                'descriptors': self.descriptors}
+
+    def add(self, frame_idx, frame):
+        signatures = {signature_type: signature.compute_signature(frame, signature_type)
+                      for signature_type in self.signature_types}
+
+        padded, count = None, 0
+        if self.sift is not None:
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if gray_frame.shape[0] > INDEX_FRAME_HEIGHT:
+                width = round(gray_frame.shape[1] * INDEX_FRAME_HEIGHT / gray_frame.shape[0])
+                gray_frame = cv2.resize(gray_frame, (width, INDEX_FRAME_HEIGHT), interpolation=cv2.INTER_AREA)
+            _, des = self.sift.detectAndCompute(gray_frame, None)
+
+            # SIFT 디스크립터 성분은 0~255 정수이므로 uint8 로 손실 없이 저장
+            padded = np.zeros((self.descriptors, 128), dtype=np.uint8)
+            count = 0 if des is None else min(len(des), self.descriptors)
+            if count:
+                padded[:count] = np.clip(des[:count], 0, 255).astype(np.uint8)
+        self.entries.append((frame_idx, signatures, padded, count))
+
+    def merge(self, entries):
+        self.entries.extend(entries)
+
+    def write(self, index_dir, frame_rate, total_frames):
+        """모은 프레임을 frame_idx 순서로(중복 제거) index_dir 에 저장하고 FrameIndex 를 반환한다"""
+        entries = sorted({entry[0]: entry for entry in self.entries}.values(), key=lambda entry: entry[0])
+
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, 'frames.npy'), np.asarray([entry[0] for entry in entries], dtype=np.int32))
+        for signature_type in self.signature_types:
+            values = np.stack([entry[1][signature_type] for entry in entries]) if entries else np.empty((0,))
+            # 실수 시그니처는 float16 으로 저장해 크기를 절반으로
+            if values.dtype == np.float32:
+                values = values.astype(np.float16)
+            np.save(os.path.join(index_dir, f'signature_{signature_type}.npy'), values)
+        if self.sift is not None:
+            np.save(os.path.join(index_dir, 'descriptors.npy'),
+                    np.stack([entry[2] for entry in entries]) if entries
+                    else np.empty((0, self.descriptors, 128), np.uint8))
+            np.save(os.path.join(index_dir, 'descriptor_counts.npy'),
+                    np.asarray([entry[3] for entry in entries], dtype=np.int16))
+
+        meta = {
+            'frame_rate': frame_rate,
+            'total_frames': total_frames,
+            'sampling_interval': self.sampling_interval,
+            'signatures': list(self.signature_types),
+            'descriptors': self.descriptors,
+        }
+        # meta.json 을 마지막에 써서 중간에 실패한 인덱스는 exists() 가 False 가 되도록 한다
+        with open(os.path.join(index_dir, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+        logger.debug(f"Frame index built: {len(entries)} frames -> {index_dir}")
+        return FrameIndex.open(index_dir)
@@ -0,0 +1,138 @@
+import cv2
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 컨테이너가 fps 를 알려 주지 않을 때(일부 스트림) 쓰는 값
+DEFAULT_FRAME_RATE = 30.0
+
+
+class FrameSource:
+    """
+    VideoCapture 를 감싸 한 방향(forward)으로만 프레임을 읽는 프레임 소스.
+
+    cap.set(CAP_PROP_POS_FRAMES) 는 매번 직전 키프레임으로 되돌아가 다시 디코딩하므로,
+    샘플링 구간에서는 필요 없는 프레임은 grab() 으로 넘기고 샘플 프레임만 retrieve() 한다.
+    """
+
+    def __init__(self, video_path, decode_height=None):
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        # 디코딩 직후 프레임을 이 높이로 줄인다 (None 이면 원본 해상도)
+        self.decode_height = decode_height
+        self.position = 0  # 다음 grab() 이 읽게 될 프레임 인덱스
+        self._keyframe_indices = None
+        # 프레임 수를 알 수 없는 스트림을 끝까지 읽었을 때 알게 된 프레임 수
+        self._frames_until_end = None
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    @property
+    def frame_rate(self):
+        frame_rate = self.cap.get(cv2.CAP_PROP_FPS)
+        return frame_rate if frame_rate > 0 else DEFAULT_FRAME_RATE
+
+    @property
+    def total_frames(self):
+        """프레임 수. 스트림처럼 알 수 없으면(0 이하) 끝까지 읽기 전까지 None"""
+        total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return total_frames if total_frames > 0 else self._frames_until_end
+
+    def keyframe_indices(self):
+        """디코딩 없이 패킷만 읽어(raw 모드) 키프레임 인덱스 목록을 구한다. 지원하지 않으면 빈 목록"""
+        if self._keyframe_indices is not None:
+            return self._keyframe_indices
+
+        keyframe_indices = []
+        raw_cap = cv2.VideoCapture(self.video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        if raw_cap.isOpened() and raw_cap.get(cv2.CAP_PROP_FORMAT) == -1:
+            frame_idx = 0
+            while raw_cap.grab():
+                if raw_cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    keyframe_indices.append(frame_idx)
+                frame_idx += 1
+        else:
+            logger.debug("Raw packet mode is not supported. Keyframe index unavailable.")
+        raw_cap.release()
+
+        self._keyframe_indices = keyframe_indices
+        return keyframe_indices
+
+    def resize(self, frame):
+        if self.decode_height is None or frame.shape[0] <= self.decode_height:
+            return frame
+        width = round(frame.shape[1] * self.decode_height / frame.shape[0])
+        return cv2.resize(frame, (width, self.decode_height), interpolation=cv2.INTER_AREA)
+
+    @property
+    def seek_threshold(self):
+        # 이 프레임 수 이내의 앞쪽 이동은 seek 보다 grab 으로 건너뛰는 편이 싸다
+        return 2 * int(self.frame_rate)
+
+    def seek(self, frame_idx):
+        # 이미 원하는 위치라면 seek 하지 않는다
+        if frame_idx == self.position:
+            return
+        # 가까운 앞쪽 위치라면 seek 대신 grab 으로 건너뛴다
+        if 0 < frame_idx - self.position <= self.seek_threshold:
+            while self.position < frame_idx:
+                if not self.cap.grab():
+                    return
+                self.position += 1
+            return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        self.position = frame_idx
+
+    def iter_frames(self, start_idx, end_idx, step=1):
+        """
+        start_idx 부터 end_idx 전까지 step 간격의 (frame_idx, frame) 을 한 번의 순방향 디코딩으로 반환.
+        end_idx 가 None 이면 동영상 끝까지 읽는다
+        """
+        if step < 1:
+            raise ValueError("step must be >= 1")
+
+        frame_indices = itertools.count(start_idx) if end_idx is None else range(start_idx, end_idx)
+        # 간격이 넓으면 사이 프레임을 모두 디코딩하는 grab 보다 샘플마다 seek 하는 편이 싸다
+        if step > self.seek_threshold:
+            for frame_idx in itertools.islice(frame_indices, 0, None, step):
+                frame = self.read_frame(frame_idx)
+                if frame is None:
+                    break
+                yield frame_idx, frame
+            return
+
+        self.seek(start_idx)
+        for frame_idx in frame_indices:
+            if not self.cap.grab():
+                # 순서대로 끝까지 읽었으므로 이제 프레임 수를 안다
+                if end_idx is None:
+                    self._frames_until_end = frame_idx
+                break
+            self.position = frame_idx + 1
+
+            if (frame_idx - start_idx) % step != 0:
+                continue
+
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            yield frame_idx, self.resize(frame)
+
+    def read_frame(self, frame_idx):
+        self.seek(frame_idx)
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position = frame_idx + 1
+        return self.resize(frame)
+
+    def release(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
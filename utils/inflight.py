@@ -0,0 +1,122 @@
+import uuid
+import logging
+from celery_config import REDIS_URL
+from utils.lease import Lease
+
+logger = logging.getLogger(__name__)
+
+# 처리 중 표시가 남아 있을 최대 시간(초). 워커가 죽어도 이 시간이 지나면 다시 작업을 만들 수 있다
+INFLIGHT_TTL = 3600
+
+# 등록된 작업이 아직 우리 것이고 저장된 우선순위보다 더 급하면(숫자가 작으면) 우선순위를 올린다
+PROMOTE_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+local current = tonumber(redis.call('get', KEYS[2]))
+if current == nil or current <= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('set', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class InflightRegistry(Lease):
+    """
+    처리 중인 동영상 -> task_id 레지스트리 (Redis).
+
+    같은 동영상에 대한 동시 요청은 SET NX 로 먼저 등록한 하나의 작업만 큐에 넣고,
+    나머지 요청은 이미 등록된 task_id 를 그대로 돌려받는다.
+    task_id 를 소유자로 하는 임대(Lease)이므로 해제도 그 작업이 등록한 표시일 때만 적용된다.
+    작업을 넣은 우선순위를 task_id 별로 함께 기록해, 크롤링으로 등록된 동영상을 사용자가 요청하면
+    promote() 로 올리고 같은 task_id 로 다시 보낼 수 있게 한다.
+    is_dead(task_id) 가 True 인 작업(실패/취소)의 표시는 TTL 을 기다리지 않고 새 작업으로 바꾼다.
+    """
+
+    def __init__(self, redis_url=REDIS_URL, prefix='inflight:process_video:', ttl=INFLIGHT_TTL,
+                 is_dead=lambda task_id: False):
+        super().__init__(redis_url, prefix=prefix, ttl=ttl)
+        self.is_dead = is_dead
+        self.promote_script = self.redis.register_script(PROMOTE_SCRIPT)
+
+    def priority_key(self, task_id):
+        # task_id 는 작업마다 새로 만들므로 다른 작업의 기록과 섞이지 않고, TTL 로 사라진다
+        return f'{self.prefix}priority:{task_id}'
+
+    def get(self, video_id):
+        return self.owner(video_id)
+
+    def priority(self, task_id):
+        value = self.redis.get(self.priority_key(task_id))
+        return None if value is None else int(value)
+
+    def claim(self, video_id, priority=0):
+        """
+        새 task_id 를 등록한다. (task_id, True) 면 호출한 쪽이 작업을 큐에 넣어야 하고,
+        (task_id, False) 면 이미 처리 중인 작업의 task_id 이다.
+        """
+        task_id = str(uuid.uuid4())
+        if self.acquire(video_id, task_id):
+            self.redis.set(self.priority_key(task_id), priority, ex=self.ttl)
+            return task_id, True
+
+        existing_task_id = self.get(video_id)
+        if existing_task_id is None or self.release_dead(video_id, existing_task_id):
+            # 방금 끝난 작업이 표시를 지웠거나 등록된 작업이 죽었다면 다시 등록을 시도
+            return self.claim(video_id, priority)
+        return existing_task_id, False
+
+    def release_dead(self, video_id, task_id):
+        # 실패/취소된 작업의 표시를 지웠으면 True (이미 다른 작업으로 바뀌었으면 지우지 않는다)
+        if not self.is_dead(task_id):
+            return False
+        logger.info(f"Replacing dead task {task_id} for {video_id}")
+        self.release(video_id, task_id)
+        return True
+
+    def promote(self, video_id, task_id, priority):
+        """처리 중인 task_id 의 우선순위를 priority 로 올렸으면 True (호출한 쪽이 다시 보내야 한다)"""
+        return bool(self.promote_script(keys=[self.key(video_id), self.priority_key(task_id)],
+                                        args=[task_id, priority, self.ttl]))
+
+    def claim_many(self, video_ids, priority=0):
+        """
+        여러 동영상을 한 번의 파이프라인으로 등록한다.
+        {video_id: (task_id, created)} 를 반환하며 created 가 True 인 것만 큐에 넣으면 된다.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        task_ids = {video_id: str(uuid.uuid4()) for video_id in video_ids}
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for video_id in video_ids:
+            pipeline.set(self.key(video_id), task_ids[video_id], nx=True, ex=self.ttl)
+        created = dict(zip(video_ids, pipeline.execute()))
+        if any(created.values()):
+            pipeline = self.redis.pipeline(transaction=False)
+            for video_id in video_ids:
+                if created[video_id]:
+                    pipeline.set(self.priority_key(task_ids[video_id]), priority, ex=self.ttl)
+            pipeline.execute()
+
+        existing = [video_id for video_id in video_ids if not created[video_id]]
+        existing_task_ids = dict(zip(existing, self.redis.mget([self.key(video_id) for video_id in existing]))) \
+            if existing else {}
+
+        claims = {}
+        for video_id in video_ids:
+            if created[video_id]:
+                claims[video_id] = (task_ids[video_id], True)
+            elif existing_task_ids.get(video_id) is not None \
+                    and not self.release_dead(video_id, existing_task_ids[video_id]):
+                claims[video_id] = (existing_task_ids[video_id], False)
+            else:
+                # 그 사이 끝난 작업이 표시를 지웠거나 죽은 작업이면 하나씩 다시 등록
+                claims[video_id] = self.claim(video_id, priority)
+        return claims
+
+    def release(self, video_id, task_id):
+        # task_id 가 없으면 큐를 거치지 않은 직접 호출이므로 무시
+        if task_id is None:
+            return False
+        return super().release(video_id, task_id)
@@ -0,0 +1,88 @@
+import time
+import redis
+import logging
+from celery_config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# 임대 유지 시간(초). 소유한 워커가 죽어도 이 시간이 지나면 다른 작업이 가져갈 수 있다
+LEASE_TTL = 3600
+# 오래 걸리는 작업이 임대를 연장하는 최소 간격(초)
+EXTEND_INTERVAL = 60
+
+# 소유자가 같을 때만 지우거나 연장하는 스크립트
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class Lease:
+    """
+    여러 호스트의 워커가 함께 쓰는 비차단 임대(lease) (Redis SET NX + TTL).
+
+    acquire() 는 기다리지 않고 바로 성공/실패를 반환하므로 중복 작업이 워커 슬롯을 잡고 있지 않는다.
+    해제/연장은 소유자(owner)가 같을 때만 적용된다.
+    """
+
+    def __init__(self, redis_url=REDIS_URL, prefix='lease:', ttl=LEASE_TTL):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.release_script = self.redis.register_script(RELEASE_SCRIPT)
+        self.extend_script = self.redis.register_script(EXTEND_SCRIPT)
+
+    def key(self, name):
+        return f'{self.prefix}{name}'
+
+    def acquire(self, name, owner):
+        # 이미 같은 소유자가 가진 임대(재시도된 작업)도 성공으로 본다
+        if self.redis.set(self.key(name), owner, nx=True, ex=self.ttl):
+            return True
+        return self.owner(name) == owner
+
+    def owner(self, name):
+        return self.redis.get(self.key(name))
+
+    def extend(self, name, owner, ttl=None):
+        return bool(self.extend_script(keys=[self.key(name)], args=[owner, ttl or self.ttl]))
+
+    def release(self, name, owner):
+        return bool(self.release_script(keys=[self.key(name)], args=[owner]))
+
+
+class LeaseKeeper:
+    """
+    작업이 도는 동안 임대를 유지한다.
+
+    hold() 는 연장하거나, 이미 만료됐으면 다시 얻어 본다 (다른 소유자가 가져갔으면 False).
+    인자 없이 호출하면 interval 초마다 한 번만 연장하므로 진행 콜백에서 자주 불러도 된다.
+    """
+
+    def __init__(self, lease, name, owner, interval=EXTEND_INTERVAL):
+        self.lease = lease
+        self.name = name
+        self.owner = owner
+        self.interval = interval
+        self.last_extended = 0.0
+
+    def hold(self):
+        self.last_extended = time.time()
+        try:
+            return self.lease.extend(self.name, self.owner) or self.lease.acquire(self.name, self.owner)
+        except redis.RedisError as e:
+            # 연장 실패로 작업을 멈추지 않는다 (TTL 이 남아 있으면 다음 호출에서 다시 연장)
+            logger.debug(f"Failed to extend lease {self.name}: {e}")
+            return True
+
+    def __call__(self, *args):
+        if time.time() - self.last_extended >= self.interval:
+            self.hold()
@@ -0,0 +1,95 @@
+import cv2
+import math
+import numpy as np
+
+# Lowe ratio test 기준: 가장 가까운 거리 / 두 번째로 가까운 거리가 이 값보다 작으면 좋은 매칭
+RATIO = 0.75
+
+# SIFT 디스크립터(각 성분이 0 이상, 노름 512)끼리의 L2 거리는 이 값을 넘지 않는다
+MAX_SIFT_DISTANCE = 1024.0
+
+FLANN_INDEX_KDTREE = 1
+
+
+class DescriptorMatcher:
+    """
+    타겟(썸네일) 디스크립터를 한 번만 인덱싱해 두고 프레임 디스크립터를 점수화하는 매칭 엔진.
+
+    score() 는 값이 작을수록 유사하다.
+    - 'bf': 기존 방식. crossCheck BFMatcher 매칭 거리의 평균
+    - 'flann': KD-tree(FLANN) 인덱스 + ratio test
+    - 'numpy': 거리 행렬을 한 번에 계산하는 벡터화 ratio test
+    ratio test 방식은 -(좋은 매칭 수) 에 평균 거리를 작은 값으로 더해 동점을 가른다.
+    """
+
+    def __init__(self, target_des, method='numpy', ratio=RATIO):
+        self.method = method
+        self.ratio = ratio
+        self.target_des = None if target_des is None else target_des.astype(np.float32)
+
+        if method == 'bf':
+            self.matcher = cv2.BFMatcher(cv2.NORM_L2, crossCheck=True)
+        elif method == 'flann':
+            self.matcher = cv2.FlannBasedMatcher(dict(algorithm=FLANN_INDEX_KDTREE, trees=4), dict(checks=32))
+            if self.target_des is not None and len(self.target_des) >= 2:
+                self.matcher.add([self.target_des])
+                self.matcher.train()
+        elif method == 'numpy':
+            self.matcher = None
+            if self.target_des is not None:
+                self.target_sq = np.einsum('ij,ij->i', self.target_des, self.target_des)
+        else:
+            raise ValueError(f"Unknown matcher: {method}")
+
+    def score(self, des):
+        if des is None or self.target_des is None or len(des) == 0:
+            return float('inf')
+
+        # 디스크립터 타입 확인 및 변환
+        if des.dtype != np.float32:
+            des = des.astype(np.float32)
+
+        if self.method == 'bf':
+            return self._score_cross_check(des)
+
+        if len(self.target_des) < 2:
+            return float('inf')
+
+        if self.method == 'flann':
+            pairs = [pair for pair in self.matcher.knnMatch(des, k=2) if len(pair) == 2]
+            if not pairs:
+                return float('inf')
+            distances = np.array([[first.distance, second.distance] for first, second in pairs], dtype=np.float32)
+        else:
+            distances = self._two_nearest(des)
+
+        return self._score_ratio(distances)
+
+    def match_ratio(self, score):
+        """ratio test 점수에서 썸네일 특징점 대비 좋은 매칭 비율을 구한다 ('bf' 는 비율을 알 수 없어 None)"""
+        if self.method == 'bf' or self.target_des is None:
+            return None
+        if score == float('inf'):
+            return 0.0
+        # score = -(좋은 매칭 수) + [0, 1) 범위의 평균 거리 항
+        return math.ceil(-score) / len(self.target_des)
+
+    def _score_cross_check(self, des):
+        matches = self.matcher.match(self.target_des, des)
+        if not matches:
+            return float('inf')
+        distances = [m.distance for m in matches]
+        return np.mean(distances)  # 거리가 작을수록 유사도가 높음
+
+    def _two_nearest(self, des):
+        # |a-b|^2 = |a|^2 + |b|^2 - 2ab 로 프레임 x 타겟 거리 행렬을 한 번에 계산
+        squared = np.einsum('ij,ij->i', des, des)[:, None] + self.target_sq[None, :] - 2.0 * des @ self.target_des.T
+        nearest = np.partition(squared, 1, axis=1)[:, :2]
+        return np.sqrt(np.clip(np.sort(nearest, axis=1), 0.0, None))
+
+    def _score_ratio(self, distances):
+        good = distances[:, 0] < self.ratio * distances[:, 1]
+        good_count = int(np.count_nonzero(good))
+        if good_count == 0:
+            return float('inf')
+        return -good_count + float(distances[good, 0].mean()) / MAX_SIFT_DISTANCE
@@ -0,0 +1,78 @@
+import redis
+import logging
+from celery_config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+FRAME_BUCKETS = (10, 30, 60, 100, 300, 600, 1000, 3000, 10000)
+
+# 이름: (설명, 버킷 상한). 모두 작업 단위로 기록한다 (프레임마다 기록하지 않음)
+HISTOGRAMS = {
+    'queue_wait_seconds': ('Time from submit until process_video starts', SECONDS_BUCKETS),
+    'analysis_queue_wait_seconds': ('Time from download finish until analysis starts', SECONDS_BUCKETS),
+    'download_seconds': ('Video download time per job', SECONDS_BUCKETS),
+    'analysis_seconds': ('Total analysis time per job', SECONDS_BUCKETS),
+    'decode_seconds': ('Frame decode time per job', SECONDS_BUCKETS),
+    'signature_seconds': ('Global signature time per job', SECONDS_BUCKETS),
+    'feature_seconds': ('SIFT feature extraction time per job', SECONDS_BUCKETS),
+    'match_seconds': ('Descriptor matching time per job', SECONDS_BUCKETS),
+    'frames_examined': ('Sampled frames compared per job', FRAME_BUCKETS),
+}
+
+
+class Metrics:
+    """
+    작업 단계별 히스토그램 (Redis).
+
+    prefork 워커, 스레드 워커, Gunicorn 워커가 모두 같은 값을 보도록 Redis 해시에 누적하고,
+    render() 로 Prometheus 텍스트 형식을 만든다. 기록 실패는 작업을 멈추지 않는다.
+    """
+
+    def __init__(self, redis_url=REDIS_URL, prefix='metrics:', namespace='thumbnail'):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+        self.namespace = namespace
+
+    def key(self, name):
+        return f'{self.prefix}{name}'
+
+    def observe_many(self, values):
+        """{이름: 값} 을 한 번의 파이프라인으로 기록"""
+        pipeline = self.redis.pipeline(transaction=False)
+        for name, value in values.items():
+            if value is None:
+                continue
+            _, buckets = HISTOGRAMS[name]
+            key = self.key(name)
+            for bucket in buckets:
+                if value <= bucket:
+                    pipeline.hincrby(key, f'le:{bucket}', 1)
+            pipeline.hincrby(key, 'count', 1)
+            pipeline.hincrbyfloat(key, 'sum', value)
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Failed to record metrics: {e}")
+
+    def observe(self, name, value):
+        self.observe_many({name: value})
+
+    def render(self):
+        pipeline = self.redis.pipeline(transaction=False)
+        for name in HISTOGRAMS:
+            pipeline.hgetall(self.key(name))
+        values = pipeline.execute()
+
+        lines = []
+        for (name, (description, buckets)), fields in zip(HISTOGRAMS.items(), values):
+            metric = f'{self.namespace}_{name}'
+            count = int(fields.get('count', 0))
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} histogram')
+            for bucket in buckets:
+                lines.append(f'{metric}_bucket{{le="{bucket}"}} {int(fields.get(f"le:{bucket}", 0))}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum {float(fields.get("sum", 0.0))}')
+            lines.append(f'{metric}_count {count}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,97 @@
+import json
+import time
+import redis
+import logging
+from celery_config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# 진행 상황을 보내는 최소 간격(초). 분석 루프가 Redis 를 두드리지 않도록 제한
+PROGRESS_INTERVAL = 1.0
+
+PROGRESS = 'PROGRESS'
+
+
+class ProgressChannel:
+    """
+    작업 진행 상황 채널 (Redis pub/sub).
+
+    워커는 publish() 로 'progress:<task_id>' 채널에 JSON 이벤트를 보내고,
+    API 는 listen() 으로 구독해 Server-Sent Events / long-poll 로 클라이언트에 전달한다.
+    """
+
+    def __init__(self, redis_url=REDIS_URL):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    @staticmethod
+    def channel(task_id):
+        return f'progress:{task_id}'
+
+    def publish(self, task_id, event):
+        self.redis.publish(self.channel(task_id), json.dumps(event))
+
+    def subscribe(self, task_id):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel(task_id))
+        return pubsub
+
+    def listen(self, pubsub, timeout, heartbeat=None):
+        """
+        이벤트(dict)를 받는 대로 반환한다. heartbeat 초 동안 이벤트가 없으면 None 을 반환하고,
+        timeout 이 지나거나 완료 이벤트를 받으면 끝난다.
+        """
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            message = pubsub.get_message(timeout=min(remaining, heartbeat or remaining))
+            if message is None:
+                if heartbeat:
+                    yield None
+                continue
+
+            event = json.loads(message['data'])
+            yield event
+            if event.get('status') != PROGRESS:
+                return
+
+
+class ProgressPublisher:
+    """분석기의 progress_callback 으로 넘겨 Celery 작업 상태(update_state)와 진행 채널을 함께 갱신한다"""
+
+    def __init__(self, task, channel, interval=PROGRESS_INTERVAL, task_id=None):
+        self.task = task
+        self.channel = channel
+        self.interval = interval
+        self.last_published = 0.0
+        # 체인으로 나눠 실행할 때는 클라이언트가 가진 task_id 로 상태를 갱신
+        self._task_id = task_id
+
+    @property
+    def task_id(self):
+        return self._task_id or self.task.request.id
+
+    def __call__(self, progress):
+        # 큐를 거치지 않은 직접 호출에는 보낼 곳이 없다
+        if self.task_id is None:
+            return
+        now = time.time()
+        if now - self.last_published < self.interval:
+            return
+        self.last_published = now
+
+        try:
+            self.task.update_state(task_id=self.task_id, state=PROGRESS, meta=progress)
+            self.channel.publish(self.task_id, {'taskId': self.task_id, 'status': PROGRESS, 'progress': progress})
+        except redis.RedisError as e:
+            # 진행 상황 전송 실패로 분석을 멈추지 않는다
+            logger.debug(f"Failed to publish progress: {e}")
+
+    def finish(self, status, result):
+        if self.task_id is None:
+            return
+        try:
+            self.channel.publish(self.task_id, {'taskId': self.task_id, 'status': status, 'result': result})
+        except redis.RedisError as e:
+            logger.debug(f"Failed to publish result: {e}")
@@ -0,0 +1,106 @@
+import glob
+import json
+import os
+import sqlite3
+import redis
+import logging
+from celery_config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# 예전 SQLite 결과 DB (import_sqlite_results 로 옮길 때만 읽는다)
+LEGACY_DB_PATH = os.environ.get('RESULT_DB', 'assets/results.db')
+
+# HMGET 한 번에 조회할 최대 videoId 수
+MAX_QUERY_KEYS = 500
+
+
+class ResultStore:
+    """
+    분석 결과 저장소 (Redis 해시).
+
+    videoId 를 필드로 결과를 JSON 으로 저장한다. 결과가 있는 videoId 가 곧 처리된 동영상이므로
+    .videos.json 목록과 result.txt 파일을 함께 대신한다.
+    여러 호스트의 워커와 API 가 같은 Redis 를 보므로 한 호스트가 저장한 결과를 모든 호스트가 바로 재사용한다.
+    결과는 만료되지 않으므로 Redis 는 AOF/RDB 로 영속화해야 한다.
+    """
+
+    def __init__(self, redis_url=REDIS_URL, key='results'):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.key = key
+
+    def get(self, video_id):
+        value = self.redis.hget(self.key, video_id)
+        return json.loads(value) if value is not None else None
+
+    def get_many(self, video_ids):
+        """여러 videoId 의 결과를 한 번에 조회 ({videoId: 결과}, 결과가 없는 id 는 빠진다)"""
+        results = {}
+        video_ids = list(video_ids)
+        for start in range(0, len(video_ids), MAX_QUERY_KEYS):
+            chunk = video_ids[start:start + MAX_QUERY_KEYS]
+            results.update((video_id, json.loads(value))
+                           for video_id, value in zip(chunk, self.redis.hmget(self.key, chunk)) if value is not None)
+        return results
+
+    def contains(self, video_id):
+        return bool(self.redis.hexists(self.key, video_id))
+
+    def filter_new(self, video_ids):
+        """아직 결과가 없는 videoId 만 입력 순서대로 반환"""
+        video_ids = list(dict.fromkeys(video_ids))
+        processed = set(self.get_many(video_ids))
+        return [video_id for video_id in video_ids if video_id not in processed]
+
+    def upsert(self, video_id, result):
+        self.redis.hset(self.key, video_id, json.dumps(result))
+
+
+def parse_result_file(result_path):
+    # 예전 assets/<videoId>/result.txt ('key: value' 줄) 형식
+    result = {}
+    with open(result_path, 'r') as file:
+        for line in file:
+            key, value = line.strip().split(': ', 1)
+            if key in ('best_frame_time', 'coverage'):
+                result[key] = float(value)
+            elif key == 'truncated':
+                result[key] = value == 'True'
+            else:
+                result[key] = value
+    return result
+
+
+def import_legacy_results(store, assets_dir='assets'):
+    """예전 result.txt 파일들을 저장소로 옮긴다 (이미 있는 결과는 덮어쓰지 않음)"""
+    imported = 0
+    for result_path in glob.glob(os.path.join(assets_dir, '*', 'result.txt')):
+        video_id = os.path.basename(os.path.dirname(result_path))
+        if store.contains(video_id):
+            continue
+        store.upsert(video_id, parse_result_file(result_path))
+        imported += 1
+    logger.debug(f"Imported {imported} legacy results")
+    return imported
+
+
+def import_sqlite_results(store, db_path=LEGACY_DB_PATH):
+    """예전 SQLite 결과 DB 를 저장소로 옮긴다 (이미 있는 결과는 덮어쓰지 않음)"""
+    if not os.path.exists(db_path):
+        return 0
+    connection = sqlite3.connect(db_path)
+    imported = 0
+    try:
+        for video_id, result in connection.execute('SELECT video_id, result FROM results'):
+            if store.redis.hsetnx(store.key, video_id, result):
+                imported += 1
+    finally:
+        connection.close()
+    logger.debug(f"Imported {imported} results from {db_path}")
+    return imported
+
+
+if __name__ == '__main__':
+    store = ResultStore()
+    import_sqlite_results(store)
+    import_legacy_results(store)
@@ -0,0 +1,132 @@
+import bisect
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 장면 전환 검출 설정
+# 검사 프레임도 retrieve/축소 비용이 들므로 10 프레임(30fps 에서 0.33초) 간격이면 짧은 컷도 충분히 잡는다
+SCENE_PROBE_STEP = 10  # 몇 프레임마다 장면 전환을 검사할지
+SCENE_PROBE_SIZE = (64, 36)  # 검사용 축소 크기
+SCENE_THRESHOLD = 0.12  # 축소 프레임 간 평균 밝기 차이(0~1)가 이 값을 넘으면 장면 전환
+SCENE_MAX_GAP = 60  # 장면 전환이 없어도 이 프레임 수마다 대표 프레임을 하나 뽑는다
+
+
+class StrideSampling:
+    """고정 간격(step)마다 프레임을 뽑는 기존 방식"""
+    name = 'stride'
+
+    def __init__(self, step):
+        self.step = step
+
+    def frames(self, source, start_idx, end_idx):
+        return source.iter_frames(start_idx, end_idx, self.step)
+
+    def refine_window(self, source, frame_idx, total_frames):
+        return max(0, frame_idx - self.step), min(total_frames, frame_idx + self.step)
+
+
+class KeyframeSampling:
+    """
+    키프레임 위치의 프레임만 비교한다. 인코더는 장면 전환마다 키프레임을 넣으므로 짧은 컷도 놓치지 않는다.
+    다음 키프레임이 seek_threshold 이내면 seek 대신 사이 프레임을 grab 으로 디코딩하며 건너뛰므로,
+    디코딩하는 프레임 수는 키프레임 수보다 많을 수 있다.
+    키프레임 간격이 step 보다 좁은 인코딩(예: mp4v 기본 12 프레임)에서는 step 이상 떨어진 키프레임만 골라
+    고정 간격보다 많은 프레임을 비교하지 않는다.
+    """
+    name = 'keyframe'
+
+    def __init__(self, step):
+        self.step = step
+
+    def thin(self, keyframe_indices):
+        """앞에서부터 직전에 고른 키프레임과 step 이상 떨어진 키프레임만 남긴다"""
+        selected = []
+        for frame_idx in keyframe_indices:
+            if not selected or frame_idx - selected[-1] >= self.step:
+                selected.append(frame_idx)
+        return selected
+
+    def frames(self, source, start_idx, end_idx):
+        keyframe_indices = [idx for idx in source.keyframe_indices()
+                            if start_idx <= idx and (end_idx is None or idx < end_idx)]
+        if not keyframe_indices:
+            # 키프레임 정보를 얻을 수 없으면 고정 간격으로 대체
+            logger.debug("No keyframe index available. Falling back to stride sampling.")
+            yield from source.iter_frames(start_idx, end_idx, self.step)
+            return
+
+        for frame_idx in self.thin(keyframe_indices):
+            # 가까운 다음 키프레임은 grab 으로, 먼 키프레임은 seek 로 (FrameSource.seek 가 판단)
+            frame = source.read_frame(frame_idx)
+            if frame is None:
+                break
+            yield frame_idx, frame
+
+    def refine_window(self, source, frame_idx, total_frames):
+        # 고른 키프레임은 step 이상 떨어져 있으므로 앞뒤 step 바깥의 가장 가까운 키프레임까지 세밀하게 비교
+        keyframe_indices = source.keyframe_indices()
+        if not keyframe_indices:
+            return max(0, frame_idx - self.step), min(total_frames, frame_idx + self.step)
+
+        position = bisect.bisect_right(keyframe_indices, frame_idx - self.step)
+        start_idx = keyframe_indices[position - 1] if position > 0 else 0
+        position = bisect.bisect_left(keyframe_indices, frame_idx + self.step)
+        end_idx = keyframe_indices[position] if position < len(keyframe_indices) else total_frames
+        return start_idx, min(total_frames, end_idx)
+
+
+class SceneSampling:
+    """축소 프레임으로 장면 전환을 검출해 장면마다 대표 프레임을 뽑는다"""
+    name = 'scene'
+
+    def __init__(self, step, probe_step=SCENE_PROBE_STEP, threshold=SCENE_THRESHOLD, max_gap=SCENE_MAX_GAP):
+        self.step = step
+        self.probe_step = probe_step
+        self.threshold = threshold
+        self.max_gap = max_gap
+
+    def frames(self, source, start_idx, end_idx):
+        previous = None
+        last_emitted = None
+        # 같은 프로세스에서 refine_window 가 이웃한 대표 프레임을 찾을 수 있도록 기록
+        self.emitted = []
+        for frame_idx, frame in source.iter_frames(start_idx, end_idx, self.probe_step):
+            small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), SCENE_PROBE_SIZE,
+                               interpolation=cv2.INTER_AREA).astype(np.float32)
+
+            is_cut = previous is None or np.mean(np.abs(small - previous)) / 255.0 > self.threshold
+            is_stale = last_emitted is not None and frame_idx - last_emitted >= self.max_gap
+            previous = small
+
+            if is_cut or is_stale:
+                last_emitted = frame_idx
+                self.emitted.append(frame_idx)
+                yield frame_idx, frame
+
+    def refine_window(self, source, frame_idx, total_frames):
+        # 이웃한 대표 프레임 사이를 세밀하게 비교한다. 세그먼트 프로세스에서 뽑아 기록이 없으면
+        # 대표 프레임 사이 간격이 최대 max_gap 이므로 앞뒤 max_gap 구간을 비교
+        emitted = getattr(self, 'emitted', [])
+        position = bisect.bisect_left(emitted, frame_idx)
+        if position >= len(emitted) or emitted[position] != frame_idx:
+            radius = max(self.step, self.max_gap)
+            return max(0, frame_idx - radius), min(total_frames, frame_idx + radius)
+
+        start_idx = emitted[position - 1] if position > 0 else 0
+        end_idx = emitted[position + 1] if position + 1 < len(emitted) else total_frames
+        return start_idx, min(total_frames, end_idx)
+
+
+SAMPLINGS = {
+    'stride': StrideSampling,
+    'keyframe': KeyframeSampling,
+    'scene': SceneSampling,
+}
+
+
+def get_sampling(sampling, step):
+    if sampling not in SAMPLINGS:
+        raise ValueError(f"Unknown sampling strategy: {sampling}")
+    return SAMPLINGS[sampling](step)
@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+
+# 전역 시그니처 계산 크기 (가로, 세로)
+LAYOUT_SIZE = (32, 32)
+COLOR_SIZE = (8, 8)
+PHASH_SIZE = 32
+PHASH_BITS = 8
+HIST_BINS = (8, 4, 4)
+
+
+def trim_letterbox(image, threshold=16):
+    """썸네일 상/하/좌/우의 검은 여백(레터박스)을 잘라낸다"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    rows = np.where(gray.mean(axis=1) > threshold)[0]
+    cols = np.where(gray.mean(axis=0) > threshold)[0]
+    if len(rows) == 0 or len(cols) == 0:
+        return image
+    return image[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+def _normalize(vector):
+    vector = vector.astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def _to_gray(frame):
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def layout_signature(frame):
+    # 축소한 흑백 레이아웃 (밝기/대비 변화에 강하도록 정규화)
+    small = cv2.resize(_to_gray(frame), LAYOUT_SIZE, interpolation=cv2.INTER_AREA)
+    return _normalize(small)
+
+
+def color_signature(frame):
+    # 축소한 컬러 레이아웃
+    if frame.ndim == 2:
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    small = cv2.resize(frame, COLOR_SIZE, interpolation=cv2.INTER_AREA)
+    return _normalize(small)
+
+
+def phash_signature(frame):
+    # DCT 기반 perceptual hash (저주파 성분이 중앙값보다 큰지 여부)
+    small = cv2.resize(_to_gray(frame), (PHASH_SIZE, PHASH_SIZE), interpolation=cv2.INTER_AREA)
+    dct = cv2.dct(small.astype(np.float32))[:PHASH_BITS, :PHASH_BITS].ravel()[1:]
+    return dct > np.median(dct)
+
+
+def hist_signature(frame):
+    # HSV 컬러 히스토그램 (확률 분포로 정규화)
+    if frame.ndim == 2:
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, HIST_BINS, [0, 180, 0, 256, 0, 256]).ravel()
+    total = hist.sum()
+    return hist / total if total > 0 else hist
+
+
+def _correlation_distance(target, signatures):
+    # 정규화된 벡터끼리의 내적 = 상관계수, 1 - 상관계수를 거리로 사용
+    return 1.0 - signatures @ target
+
+
+def _hamming_distance(target, signatures):
+    return np.count_nonzero(signatures != target, axis=1).astype(np.float32)
+
+
+def _bhattacharyya_distance(target, signatures):
+    coefficient = np.sqrt(signatures * target).sum(axis=1)
+    return np.sqrt(np.clip(1.0 - coefficient, 0.0, None))
+
+
+# 시그니처 종류별 (계산 함수, 배치 거리 함수)
+SIGNATURES = {
+    'layout': (layout_signature, _correlation_distance),
+    'color': (color_signature, _correlation_distance),
+    'phash': (phash_signature, _hamming_distance),
+    'hist': (hist_signature, _bhattacharyya_distance),
+}
+
+
+def get_signature(signature_type):
+    if signature_type not in SIGNATURES:
+        raise ValueError(f"Unknown signature type: {signature_type}")
+    return SIGNATURES[signature_type]
+
+
+def compute_signature(frame, signature_type='layout'):
+    compute, _ = get_signature(signature_type)
+    return compute(frame)
+
+
+def score_signatures(target_signature, signatures, signature_type='layout'):
+    """여러 프레임의 시그니처를 한 번에 타겟과 비교한다 (값이 작을수록 유사)"""
+    _, distance = get_signature(signature_type)
+    signatures = np.asarray(signatures)
+    if len(signatures) == 0:
+        return np.empty(0, dtype=np.float32)
+    return distance(target_signature, signatures)